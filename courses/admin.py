@@ -1,5 +1,30 @@
 from django.contrib import admin
-from .models import Course, Category
+from .models import Course, Category, PdfIngestionJob, ImageDerivativeJob, ChunkedUpload, PdfExtractionStats
+
+class PdfIngestionJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'course', 'status', 'pages_done', 'pages_total', 'attempts', 'created_at', 'finished_at')
+    list_filter = ('status',)
+
+class ImageDerivativeJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'image_name', 'status', 'attempts', 'created_at', 'finished_at')
+    list_filter = ('status',)
+
+class ChunkedUploadAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'kind', 'filename', 'offset', 'size', 'status', 'updated_at')
+    list_filter = ('status', 'kind')
+
+class PdfExtractionStatsAdmin(admin.ModelAdmin):
+    """Slowest ingestions first; narrow to recent ones with the date filter."""
+    list_display = ('pdf_name', 'created_at', 'total_seconds', 'open_seconds', 'get_text_seconds',
+                    'classify_seconds', 'persist_seconds', 'pages', 'pages_per_second', 'blocks_per_second',
+                    'sections', 'workers', 'from_cache')
+    list_filter = ('created_at', 'from_cache')
+    ordering = ('-total_seconds',)
+    date_hierarchy = 'created_at'
 
 admin.site.register(Course)
 admin.site.register(Category)
+admin.site.register(PdfIngestionJob, PdfIngestionJobAdmin)
+admin.site.register(ImageDerivativeJob, ImageDerivativeJobAdmin)
+admin.site.register(ChunkedUpload, ChunkedUploadAdmin)
+admin.site.register(PdfExtractionStats, PdfExtractionStatsAdmin)
@@ -0,0 +1,88 @@
+"""
+Async versions of the read-heavy endpoints, for ASGI deployments.
+
+Under ASGI every DRF view in views.py runs through sync_to_async on a
+single shared thread, so concurrent requests queue behind each other for
+their whole duration. These views run on the event loop and only hand the
+queries themselves to the ORM's async API; serialization reuses the same
+serializers and query plans as the sync views, so responses match.
+They are served under courses/api/async/.
+"""
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from rest_framework.exceptions import APIException, AuthenticationFailed
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .models import Category, Course, EnrolledCourse, Review
+from .pagination import ReviewCursorPagination
+from .query_planning import optimize_queryset
+from .serializers import CategorySerializer, CourseSerializer, EnrolledCourseSerializer, ReviewSerializer
+
+
+def _not_found():
+    return JsonResponse({"detail": "Not found."}, status=404)
+
+
+async def _authenticate(request):
+    """Returns the JWT user of the request, or a 401 JsonResponse."""
+    try:
+        result = await sync_to_async(JWTAuthentication().authenticate)(request)
+    except AuthenticationFailed as e:
+        return None, JsonResponse({"detail": str(e.detail)}, status=401)
+    if result is None:
+        return None, JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+    return result[0], None
+
+
+async def courses(request):
+    queryset = optimize_queryset(Course.objects.all(), CourseSerializer)
+    items = [course async for course in queryset]
+    data = CourseSerializer(items, many=True, context={'request': request}).data
+    return JsonResponse(data, safe=False)
+
+
+async def course(request, pk):
+    queryset = optimize_queryset(Course.objects.all(), CourseSerializer)
+    try:
+        item = await queryset.aget(id=pk)
+    except (Course.DoesNotExist, ValueError):
+        return _not_found()
+    data = CourseSerializer(item, context={'request': request}).data
+    return JsonResponse(data)
+
+
+async def categories(request):
+    items = [category async for category in Category.objects.all()]
+    data = CategorySerializer(items, many=True, context={'request': request}).data
+    return JsonResponse(data, safe=False)
+
+
+async def course_reviews(request, cours_id):
+    """Same cursor format as CourseReviewsView, so clients can switch freely."""
+    queryset = optimize_queryset(
+        Review.objects.filter(cours_id=cours_id).order_by('-date_creation', '-id'), ReviewSerializer
+    )
+    drf_request = Request(request)
+    paginator = ReviewCursorPagination()
+    try:
+        page = await sync_to_async(paginator.paginate_queryset)(queryset, drf_request)
+    except APIException as e:
+        # No DRF exception handler here: a bad cursor raises NotFound.
+        return JsonResponse({"detail": str(e.detail)}, status=e.status_code)
+    data = ReviewSerializer(page, many=True, context={'request': drf_request}).data
+    return JsonResponse({
+        'next': paginator.get_next_link(),
+        'previous': paginator.get_previous_link(),
+        'results': data,
+    })
+
+
+async def my_courses(request):
+    user, error = await _authenticate(request)
+    if error is not None:
+        return error
+    queryset = optimize_queryset(EnrolledCourse.objects.filter(etudiant=user), EnrolledCourseSerializer)
+    items = [enrollment async for enrollment in queryset]
+    data = EnrolledCourseSerializer(items, many=True, context={'request': request}).data
+    return JsonResponse(data, safe=False)
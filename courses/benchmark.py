@@ -0,0 +1,280 @@
+"""
+Performance benchmark harness, driven by `manage.py run_benchmarks`.
+
+Builds a synthetic dataset of configurable size with bulk inserts, then
+replays requests against the main endpoints through the Django test client
+and records latency percentiles, throughput and queries per request. PDF
+ingestion is timed end to end on a generated document. The command runs
+everything against a throwaway test database and emits one JSON document,
+so results from different commits can be diffed.
+"""
+import math
+import random
+import statistics
+import time
+from collections import Counter
+
+import fitz  # PyMuPDF
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .ingestion import ingest_course_pdf
+from .models import (
+    Category, Choice, Course, CoursePdfInternal, CourseSection, EnrolledCourse, Question, Quiz, Review,
+)
+from .ratings import rebuild_all
+from .response_cache import bump_version
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+WORDS = (
+    "analyse donnees modele fonction variable classe objet methode algorithme structure liste tableau "
+    "boucle condition reseau serveur client requete reponse base index cle valeur exemple exercice "
+    "chapitre notion theorie pratique projet module interface systeme memoire processus fichier"
+).split()
+
+
+def make_pdf(path, pages, sections_per_page=3):
+    """Writes a PDF with numbered headings, sub-headings and body text on every page."""
+    doc = fitz.open()
+    number = 0
+    for _ in range(pages):
+        page = doc.new_page()
+        y = 72
+        for _ in range(sections_per_page):
+            number += 1
+            page.insert_text((72, y), f"{number}. Heading number {number}", fontsize=12)
+            page.insert_text((72, y + 20), f"Body text for section {number}, first paragraph.", fontsize=10)
+            page.insert_text((72, y + 60), f"1.{number} Sub heading of section {number}", fontsize=10)
+            page.insert_text((72, y + 100), f"More body text for section {number}.", fontsize=10)
+            y += 150
+    doc.save(path)
+    doc.close()
+
+
+def _text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def build_dataset(courses=1000, sections=20, reviews=10, students=200, enrollments=20,
+                  quizzes=50, questions=10, choices=4, seed=0):
+    """
+    Bulk-creates the synthetic dataset. Counts are per course (sections,
+    reviews), per student (enrollments) and per quiz (questions) and per
+    question (choices). Returns the ids the scenarios need.
+    """
+    rng = random.Random(seed)
+    password = make_password(None)
+
+    professor = User.objects.create(username='bench-professor', role='prof', password=password)
+    student_objs = User.objects.bulk_create(
+        [User(username=f'bench-student-{i}', role='etudiant', password=password) for i in range(students)],
+        batch_size=BATCH_SIZE,
+    )
+    categories = Category.objects.bulk_create(
+        [Category(categoryName=f'Benchmark category {i}', description=_text(rng, 12)) for i in range(10)]
+    )
+    course_objs = Course.objects.bulk_create(
+        [
+            Course(
+                title=f"Course {i} {_text(rng, 3)}", description=_text(rng, 40), file_type='pdf',
+                duration='2h', professor=professor, category=rng.choice(categories),
+            )
+            for i in range(courses)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+    pdf_objs = CoursePdfInternal.objects.bulk_create(
+        [
+            CoursePdfInternal(
+                course=course, name=f'courses/pdfs/benchmark-{course.pk}.pdf',
+                table_of_contents=[{'title': f"{order + 1}. Section {order + 1}", 'order': order}
+                                   for order in range(sections)],
+            )
+            for course in course_objs
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    batch = []
+    for pdf_data in pdf_objs:
+        for order in range(sections):
+            batch.append(CourseSection(
+                pdf_data=pdf_data, title=f"{order + 1}. Section {order + 1}", content=_text(rng, 150), order=order,
+            ))
+        if len(batch) >= BATCH_SIZE:
+            CourseSection.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+            batch = []
+    CourseSection.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+
+    batch = []
+    for course in course_objs:
+        for _ in range(reviews):
+            batch.append(Review(
+                cours=course, etudiant=rng.choice(student_objs), note=rng.randint(1, 5), commentaire=_text(rng, 20),
+            ))
+        if len(batch) >= BATCH_SIZE:
+            Review.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+            batch = []
+    Review.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+    rebuild_all()  # bulk_create skips the signals that maintain rating aggregates
+
+    batch = []
+    for student in student_objs:
+        for course in rng.sample(course_objs, min(enrollments, len(course_objs))):
+            batch.append(EnrolledCourse(cours=course, etudiant=student))
+        if len(batch) >= BATCH_SIZE:
+            EnrolledCourse.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+            batch = []
+    EnrolledCourse.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+
+    quiz_objs = Quiz.objects.bulk_create(
+        [Quiz(course=course_objs[i % len(course_objs)], title=f"Quiz {i}") for i in range(quizzes)]
+    )
+    question_objs = Question.objects.bulk_create(
+        [Question(quiz=quiz, text=_text(rng, 10)) for quiz in quiz_objs for _ in range(questions)],
+        batch_size=BATCH_SIZE,
+    )
+    Choice.objects.bulk_create(
+        [
+            Choice(question=question, text=_text(rng, 4), is_correct=index == 0)
+            for question in question_objs for index in range(choices)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+    return {
+        'professor': professor,
+        'category': categories[0],
+        'students': [student.pk for student in student_objs],
+        'courses': [course.pk for course in course_objs],
+        'quizzes': [quiz.pk for quiz in quiz_objs],
+    }
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def measure(action, iterations, warmup=2, before=None):
+    """
+    Calls action(i) `iterations` times after `warmup` untimed calls.
+    before(), if given, runs untimed ahead of every call (e.g. to clear a
+    cache). Returns latency percentiles in milliseconds, throughput over the
+    timed calls and the number of queries per call.
+    """
+    for i in range(warmup):
+        if before:
+            before()
+        action(i)
+
+    latencies = []
+    query_counts = []
+    statuses = Counter()
+    for i in range(iterations):
+        if before:
+            before()
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            response = action(i)
+            latencies.append(time.perf_counter() - started)
+        query_counts.append(len(context.captured_queries))
+        statuses[str(response.status_code)] += 1
+
+    ordered = sorted(latencies)
+    return {
+        'iterations': iterations,
+        'latency_ms': {
+            'mean': round(statistics.fmean(ordered) * 1000, 3),
+            'p50': round(percentile(ordered, 0.50) * 1000, 3),
+            'p95': round(percentile(ordered, 0.95) * 1000, 3),
+            'p99': round(percentile(ordered, 0.99) * 1000, 3),
+            'min': round(ordered[0] * 1000, 3),
+            'max': round(ordered[-1] * 1000, 3),
+        },
+        'throughput_rps': round(iterations / sum(latencies), 2),
+        'queries': {'min': min(query_counts), 'max': max(query_counts), 'mean': statistics.fmean(query_counts)},
+        'status_codes': dict(statuses),
+    }
+
+
+def endpoint_scenarios(dataset, users=20):
+    """
+    Returns (name, action, before) triples for measure(). Authenticated
+    scenarios rotate over `users` students with real JWT access tokens.
+    Catalog endpoints are measured with the response cache emptied before
+    every call, and once more warm.
+    """
+    client = Client()
+    course_ids = dataset['courses']
+    quiz_ids = dataset['quizzes']
+    tokens = [
+        f"Bearer {RefreshToken.for_user(User(pk=pk)).access_token}" for pk in dataset['students'][:users]
+    ]
+    answers = {
+        quiz_id: [
+            {'question_id': question_id, 'selected_choice_id': choice_id}
+            for question_id, choice_id in Choice.objects.filter(
+                question__quiz_id=quiz_id, is_correct=True
+            ).values_list('question_id', 'id')
+        ]
+        for quiz_id in quiz_ids
+    }
+
+    def submit(i):
+        quiz_id = quiz_ids[i % len(quiz_ids)]
+        return client.post(
+            '/courses/api/submit-quiz/', {'quiz_id': quiz_id, 'answers': answers[quiz_id]},
+            content_type='application/json', HTTP_AUTHORIZATION=tokens[i % len(tokens)],
+        )
+
+    return [
+        ('courses', lambda i: client.get('/courses/'), bump_version),
+        ('courses_cached', lambda i: client.get('/courses/'), None),
+        ('course', lambda i: client.get(f'/courses/{course_ids[i % len(course_ids)]}/'), bump_version),
+        ('course_cached', lambda i: client.get(f'/courses/{course_ids[0]}/'), None),
+        ('submit_quiz', submit, None),
+        ('course_reviews', lambda i: client.get(f'/courses/api/reviews/{course_ids[i % len(course_ids)]}/'), None),
+        ('my_courses', lambda i: client.get(
+            '/courses/api/enroll/my-courses/', HTTP_AUTHORIZATION=tokens[i % len(tokens)]
+        ), None),
+    ]
+
+
+def benchmark_ingestion(pdf_path, pdf_name, professor, category):
+    """Creates a course for the PDF at pdf_path (stored as pdf_name) and times its ingestion."""
+    course = Course.objects.create(
+        title='Benchmark PDF', description='Generated document', file_type='pdf',
+        pdfs=pdf_name, professor=professor, category=category,
+    )
+    with CaptureQueriesContext(connection) as context:
+        started = time.perf_counter()
+        pdf_data = ingest_course_pdf(course)
+        elapsed = time.perf_counter() - started
+
+    stats = pdf_data.extraction_stats.first()
+    return {
+        'seconds': round(elapsed, 4),
+        'queries': len(context.captured_queries),
+        'pages': stats.pages,
+        'blocks': stats.blocks,
+        'sections': stats.sections,
+        'workers': stats.workers,
+        'pages_per_second': stats.pages_per_second,
+        'blocks_per_second': stats.blocks_per_second,
+        'stages_seconds': {
+            'open': round(stats.open_seconds, 4),
+            'get_text': round(stats.get_text_seconds, 4),
+            'classify': round(stats.classify_seconds, 4),
+            'extract_wall': round(stats.extract_seconds, 4),
+            'persist': round(stats.persist_seconds, 4),
+        },
+    }
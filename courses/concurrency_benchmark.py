@@ -0,0 +1,126 @@
+"""
+Sync vs async concurrency benchmark, driven by `manage.py benchmark_concurrency`.
+
+Many clients hit an endpoint at once, and each one is slow to read its
+response: it takes `client_delay` seconds to receive the body. The same
+endpoint is served three ways, all in this process:
+
+- wsgi_sync: the WSGI handler on a pool of `threads` worker threads, like a
+  threaded WSGI server. Writing to a slow client blocks the worker thread.
+- asgi_sync: the ASGI handler serving the DRF view from views.py.
+- asgi_async: the ASGI handler serving the async view from async_views.py.
+
+Per scenario it reports latency percentiles, wall time and throughput, which
+show how many slow clients one process can serve concurrently.
+"""
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.asgi import get_asgi_application
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from django.test import RequestFactory
+
+from .benchmark import percentile
+
+
+def _summary(latencies, wall_seconds, statuses):
+    ordered = sorted(latencies)
+    return {
+        'requests': len(ordered),
+        'latency_ms': {
+            'mean': round(statistics.fmean(ordered) * 1000, 3),
+            'p50': round(percentile(ordered, 0.50) * 1000, 3),
+            'p95': round(percentile(ordered, 0.95) * 1000, 3),
+            'max': round(ordered[-1] * 1000, 3),
+        },
+        'wall_seconds': round(wall_seconds, 3),
+        'throughput_rps': round(len(ordered) / wall_seconds, 2),
+        'status_codes': {str(code): statuses.count(code) for code in sorted(set(statuses))},
+    }
+
+
+def run_wsgi(path, clients, threads, client_delay, headers=None):
+    """`clients` simultaneous requests to path through WSGIHandler on `threads` threads."""
+    handler = WSGIHandler()
+    factory = RequestFactory()
+    extra = {f"HTTP_{name.upper().replace('-', '_')}": value for name, value in (headers or {}).items()}
+
+    def one_request(submitted):
+        environ = factory.get(path, **extra).environ
+        status = []
+        body = handler(environ, lambda status_line, response_headers, exc_info=None: status.append(status_line))
+        try:
+            for chunk in body:
+                pass
+            time.sleep(client_delay)  # The worker blocks while the slow client reads
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+            connections.close_all()
+        return time.perf_counter() - submitted, int(status[0].split(' ', 1)[0])
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        futures = [executor.submit(one_request, time.perf_counter()) for _ in range(clients)]
+        results = [future.result() for future in futures]
+    wall_seconds = time.perf_counter() - started
+    return _summary([latency for latency, _ in results], wall_seconds, [code for _, code in results])
+
+
+async def _asgi_request(application, path, client_delay, headers):
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [(b'host', b'testserver')] + [
+            (name.lower().encode(), value.encode()) for name, value in (headers or {}).items()
+        ],
+        'client': ('127.0.0.1', 0),
+        'server': ('testserver', 80),
+    }
+    done = asyncio.Event()
+    request_sent = False
+    status = []
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await done.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+        elif message['type'] == 'http.response.body' and not message.get('more_body'):
+            await asyncio.sleep(client_delay)  # Only this request waits on the slow client
+            done.set()
+
+    started = time.perf_counter()
+    await application(scope, receive, send)
+    return time.perf_counter() - started, status[0]
+
+
+def run_asgi(path, clients, client_delay, headers=None):
+    """`clients` simultaneous requests to path through Django's ASGI handler on one event loop."""
+    application = get_asgi_application()
+
+    async def run_all():
+        return await asyncio.gather(*(
+            _asgi_request(application, path, client_delay, headers) for _ in range(clients)
+        ))
+
+    started = time.perf_counter()
+    results = asyncio.run(run_all())
+    wall_seconds = time.perf_counter() - started
+    return _summary([latency for latency, _ in results], wall_seconds, [code for _, code in results])
@@ -0,0 +1,218 @@
+"""
+PDF section extraction engine.
+
+Pages are read with PyMuPDF either serially or, for large documents, sharded
+into page ranges across a ProcessPoolExecutor where each worker opens its own
+`fitz` document. Block streams are merged back in page order before section
+assembly, so both paths produce identical sections and TOC.
+
+The pipeline is built from generators (page blocks -> heading classifier ->
+section accumulator) so callers can persist sections as they complete
+instead of holding the whole document in memory.
+
+This module deliberately does not import Django models so pool workers can
+import it cheaply.
+"""
+import math
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz  # PyMuPDF
+from django.conf import settings
+
+MAIN_HEADING_PATTERN = re.compile(r"^(?:[IVXLCDM]+\.|[A-Z]\.|[0-9]+\.)\s+.{3,}", re.IGNORECASE)
+SUB_HEADING_PATTERN = re.compile(r"^(?:[a-z]\.|[0-9]+\.[0-9]+(?:\.[0-9]+)*)\s+.{3,}", re.IGNORECASE)
+
+# Bump when the heading rules or section format change; invalidates cached results.
+EXTRACTION_VERSION = 1
+
+CHUNKS_PER_WORKER = 4  # More chunks than workers keeps the pool busy when pages vary in cost
+
+
+class ExtractionStats:
+    """
+    Per-stage counters of one extraction, filled in when passed as `stats`.
+    On the parallel path open/get_text times are summed over pool workers
+    (worker-seconds), so they can exceed the wall time.
+    """
+
+    def __init__(self):
+        self.workers = 1
+        self.pages = 0
+        self.blocks = 0
+        self.sections = 0
+        self.open_seconds = 0.0
+        self.get_text_seconds = 0.0
+        self.classify_seconds = 0.0
+
+
+def default_workers():
+    return getattr(settings, 'PDF_EXTRACTION_WORKERS', 1)
+
+
+def _read_page_blocks(doc, page_num):
+    return [b[4] for b in doc.load_page(page_num).get_text("blocks", sort=True)]
+
+
+def _extract_page_range(file_path, start, stop):
+    """
+    Pool worker: returns the block texts of pages [start, stop), one list per
+    page, with the seconds spent opening the document and reading text.
+    """
+    started = time.perf_counter()
+    doc = fitz.open(file_path)
+    opened = time.perf_counter()
+    try:
+        pages = [_read_page_blocks(doc, page_num) for page_num in range(start, stop)]
+    finally:
+        doc.close()
+    return pages, opened - started, time.perf_counter() - opened
+
+
+def page_ranges(page_count, workers):
+    """Splits [0, page_count) into contiguous (start, stop) shards for the pool."""
+    chunk_size = max(1, math.ceil(page_count / (workers * CHUNKS_PER_WORKER)))
+    return [(start, min(start + chunk_size, page_count)) for start in range(0, page_count, chunk_size)]
+
+
+def iter_page_blocks(file_path, workers=None, progress_callback=None, stats=None):
+    """
+    Yields the list of block texts of each page, in page order.
+    Uses a process pool when workers > 1 and the document has at least
+    PDF_EXTRACTION_PARALLEL_MIN_PAGES pages.
+    """
+    workers = default_workers() if workers is None else workers
+    min_pages = getattr(settings, 'PDF_EXTRACTION_PARALLEL_MIN_PAGES', 32)
+    stats = stats or ExtractionStats()
+
+    started = time.perf_counter()
+    doc = fitz.open(file_path)
+    stats.open_seconds += time.perf_counter() - started
+    page_count = len(doc)
+
+    if workers <= 1 or page_count < min_pages:
+        try:
+            for page_num in range(page_count):
+                started = time.perf_counter()
+                blocks = _read_page_blocks(doc, page_num)
+                stats.get_text_seconds += time.perf_counter() - started
+                stats.pages += 1
+                yield blocks
+                if progress_callback:
+                    progress_callback(page_num + 1, page_count)
+        finally:
+            doc.close()
+        return
+
+    doc.close()
+    ranges = deque(page_ranges(page_count, workers))
+    max_workers = min(workers, len(ranges))
+    stats.workers = max_workers
+    pages_done = 0
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        # Only a bounded window of shards is in flight, and results are
+        # consumed in submission order, i.e. page order.
+        pending = deque()
+        while ranges or pending:
+            while ranges and len(pending) < max_workers * 2:
+                start, stop = ranges.popleft()
+                pending.append(executor.submit(_extract_page_range, file_path, start, stop))
+            shard, open_seconds, get_text_seconds = pending.popleft().result()
+            stats.open_seconds += open_seconds
+            stats.get_text_seconds += get_text_seconds
+            stats.pages += len(shard)
+            for blocks in shard:
+                yield blocks
+            pages_done += len(shard)
+            if progress_callback:
+                progress_callback(pages_done, page_count)
+
+
+HEADING = 'heading'
+TEXT = 'text'
+
+
+def classify_blocks(page_blocks, stats=None):
+    """
+    Turns a page-ordered block stream into (kind, text, body) tuples.
+    A block is a HEADING when its first line looks like a main heading not
+    seen before; text is then the title and body the rest of the block.
+    Any other block is TEXT with the whole stripped block as text.
+    """
+    seen_titles = set()  # To track titles that have already been added
+    for blocks in page_blocks:
+        # Classify the whole page before yielding, so the timing excludes consumers.
+        started = time.perf_counter()
+        classified = []
+        for raw_text in blocks:
+            block_text = raw_text.strip()
+            lines = block_text.split('\n')
+            first_line = lines[0].strip()
+
+            is_main_heading = MAIN_HEADING_PATTERN.match(first_line)
+            is_sub_heading = SUB_HEADING_PATTERN.match(first_line)
+
+            if is_main_heading and not is_sub_heading and first_line not in seen_titles:
+                seen_titles.add(first_line)
+                classified.append((HEADING, first_line, "\n".join(lines[1:])))
+            else:
+                classified.append((TEXT, block_text, None))
+        if stats is not None:
+            stats.classify_seconds += time.perf_counter() - started
+            stats.blocks += len(blocks)
+        yield from classified
+
+
+def iter_sections(classified_blocks, stats=None):
+    """
+    Accumulates classified blocks into sections, yielding each one as soon as
+    the next heading (or the end of the document) closes it. Content is
+    buffered as a list and joined once, so long sections stay linear.
+    Text before the first heading is dropped.
+    """
+    title = None
+    parts = None
+    section_order = 0
+
+    for kind, text, body in classified_blocks:
+        if kind == HEADING:
+            if title is not None:
+                if stats is not None:
+                    stats.sections += 1
+                yield {'title': title, 'content': "".join(parts), 'order': section_order}
+                section_order += 1
+            title = text
+            parts = [body]
+        elif title is not None:
+            parts.append(text)
+            parts.append("\n")
+
+    if title is not None:
+        if stats is not None:
+            stats.sections += 1
+        yield {'title': title, 'content': "".join(parts), 'order': section_order}
+
+
+def stream_sections(file_path, workers=None, progress_callback=None, stats=None):
+    """
+    Lazily yields the sections of the PDF at file_path, one at a time.
+    Pass an ExtractionStats as `stats` to collect per-stage timings.
+    """
+    page_blocks = iter_page_blocks(file_path, workers=workers, progress_callback=progress_callback, stats=stats)
+    return iter_sections(classify_blocks(page_blocks, stats=stats), stats=stats)
+
+
+def toc_entry(section):
+    return {'title': section['title'], 'order': section['order']}
+
+
+def extract_sections(file_path, workers=None, progress_callback=None, stats=None):
+    """
+    Extracts all sections and the TOC from the PDF at file_path.
+    workers=1 forces the serial path; None uses PDF_EXTRACTION_WORKERS.
+    Returns: tuple(list_of_sections, list_of_toc_entries)
+    """
+    sections = list(stream_sections(file_path, workers=workers, progress_callback=progress_callback, stats=stats))
+    return sections, [toc_entry(section) for section in sections]
@@ -0,0 +1,89 @@
+"""
+On-disk cache of PDF extraction results, keyed by the SHA-256 of the PDF bytes.
+
+Django renames re-uploaded files (`_89DS0gu` suffixes), so the file name says
+nothing about the content; the hash does. Identical documents, including the
+same PDF attached to several courses, are parsed once. Entries are JSON-lines
+files (one section per line) so they can be read and written as streams.
+The least recently used entries are evicted once the cache exceeds
+PDF_EXTRACTION_CACHE_MAX_BYTES.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from django.conf import settings
+
+from .extraction import EXTRACTION_VERSION
+from .file_cache import evict_lru
+
+logger = logging.getLogger('courses.extraction')
+
+CACHE_DIR = getattr(settings, 'PDF_EXTRACTION_CACHE_DIR', os.path.join(settings.BASE_DIR, 'cache', 'extraction'))
+MAX_BYTES = getattr(settings, 'PDF_EXTRACTION_CACHE_MAX_BYTES', 512 * 1024 * 1024)
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _entry_path(digest):
+    # The extractor version is part of the key so rule changes invalidate old entries.
+    return os.path.join(CACHE_DIR, digest[:2], f"{digest}-v{EXTRACTION_VERSION}.jsonl")
+
+
+def get_sections(digest):
+    """
+    Returns a generator over the cached sections for digest, or None on a miss.
+    A hit refreshes the entry's mtime, which eviction uses as last access.
+    """
+    path = _entry_path(digest)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    logger.info(f"Extraction cache hit for {digest}")
+    return _read_entry(path)
+
+
+def _read_entry(path):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def caching_sections(digest, sections):
+    """
+    Passes sections through while writing them to a cache entry for digest.
+    The entry is only published once the stream is fully consumed, so a
+    failed extraction never leaves a truncated result behind.
+    """
+    path = _entry_path(digest)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for section in sections:
+                f.write(json.dumps(section, ensure_ascii=False))
+                f.write('\n')
+                yield section
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    evict()
+
+
+def evict(max_bytes=None):
+    """Deletes least recently used entries until the cache fits in max_bytes."""
+    removed = evict_lru(CACHE_DIR, MAX_BYTES if max_bytes is None else max_bytes, ('.jsonl',))
+    if removed:
+        logger.info(f"Evicted {removed} extraction cache entries.")
+    return removed
@@ -0,0 +1,41 @@
+"""
+Helpers shared by the on-disk caches (extraction_cache.py, previews.py).
+"""
+import os
+
+
+def evict_lru(directory, max_bytes, suffixes):
+    """
+    Deletes the least recently used files ending in one of `suffixes` under
+    directory until their total size fits in max_bytes. Callers refresh a
+    file's mtime on every hit, so mtime is the last access. Files being
+    written under another name (e.g. '.tmp') are left alone.
+    Returns the number of files deleted.
+    """
+    entries = []
+    total = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if not name.endswith(suffixes):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue  # Evicted concurrently
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+    if total <= max_bytes:
+        return 0
+    removed = 0
+    for _, size, path in sorted(entries):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+        if total <= max_bytes:
+            break
+    return removed
@@ -0,0 +1,73 @@
+"""
+Quiz grading.
+
+A quiz's answer key ({question_id: {choice_id: is_correct}}) is loaded with a
+single query, then submissions are validated and scored against it in memory.
+"""
+from rest_framework.exceptions import ValidationError
+
+from .models import Question
+
+
+def load_answer_keys(quiz_ids):
+    """Returns {quiz_id: answer_key} for the given quizzes in one query."""
+    keys = {quiz_id: {} for quiz_id in quiz_ids}
+    rows = Question.objects.filter(quiz_id__in=keys).values_list('quiz_id', 'id', 'choices__id', 'choices__is_correct')
+    for quiz_id, question_id, choice_id, is_correct in rows:
+        choices = keys[quiz_id].setdefault(question_id, {})
+        if choice_id is not None:  # Question without choices
+            choices[choice_id] = is_correct
+    return keys
+
+
+def load_answer_key(quiz_id):
+    return load_answer_keys([quiz_id])[quiz_id]
+
+
+def answer_errors(answer_key, answers):
+    """
+    Validates every answer in one pass and returns a list of error dicts
+    (empty if valid). Each question may be answered at most once.
+    """
+    if not isinstance(answers, list):
+        return [{'error': "answers must be a list."}]
+    errors = []
+    seen = set()
+    for index, answer in enumerate(answers):
+        try:
+            question_id = int(answer['question_id'])
+            choice_id = int(answer['selected_choice_id'])
+        except (KeyError, TypeError, ValueError):
+            errors.append({'index': index, 'error': "question_id and selected_choice_id must be integers."})
+            continue
+        choices = answer_key.get(question_id)
+        if question_id in seen:
+            errors.append({'index': index, 'error': f"Question {question_id} is answered more than once."})
+        elif choices is None:
+            errors.append({'index': index, 'error': f"Question {question_id} is not part of this quiz."})
+        elif choice_id not in choices:
+            errors.append({'index': index, 'error': f"Choice {choice_id} does not belong to question {question_id}."})
+        seen.add(question_id)
+    return errors
+
+
+def score_answers(answer_key, answers):
+    """
+    Percentage of the quiz's questions answered correctly. Answers must have
+    been validated by answer_errors, so each question appears at most once.
+    """
+    if not answer_key:
+        return 0.0
+    correct = sum(
+        1 for answer in answers
+        if answer_key[int(answer['question_id'])][int(answer['selected_choice_id'])]
+    )
+    return (correct / len(answer_key)) * 100
+
+
+def grade(answer_key, answers):
+    """Validates and scores a submission, raising ValidationError with every bad answer."""
+    errors = answer_errors(answer_key, answers)
+    if errors:
+        raise ValidationError({'answers': errors})
+    return score_answers(answer_key, answers)
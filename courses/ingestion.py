@@ -0,0 +1,372 @@
+"""
+Background PDF ingestion.
+
+Saving a Course only queues a PdfIngestionJob (see the post_save signal in
+models.py). The PyMuPDF extraction runs in worker processes started with
+`manage.py run_ingestion_workers`, which claim jobs from the database, report
+page progress on the job row and retry failures with exponential backoff.
+Only one job per course runs at a time: a job queued for a newer file waits
+until the running one has noticed it was superseded and stopped.
+The same workers also run ImageDerivativeJobs, which resize uploaded images
+(see intellectra/imaging.py); being short, they are taken first. Chunked
+uploads waiting for checksum verification (see uploads.py) come next.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+from . import extraction_cache
+from .extraction import ExtractionStats
+from .extraction_cache import file_sha256
+from intellectra.imaging import delete_derivatives, write_derivatives
+
+from .models import ChunkedUpload, Course, CoursePdfInternal, ImageDerivativeJob, PdfExtractionStats, PdfIngestionJob
+from .persistence import save_sections
+from .uploads import claim_next_upload, verify_upload
+
+logger = logging.getLogger('courses.extraction')
+
+MAX_ATTEMPTS = getattr(settings, 'PDF_INGESTION_MAX_ATTEMPTS', 3)
+RETRY_DELAY = getattr(settings, 'PDF_INGESTION_RETRY_DELAY', 30)  # seconds, doubled per attempt
+JOB_TIMEOUT = getattr(settings, 'PDF_INGESTION_JOB_TIMEOUT', 3600)  # seconds before a running job is considered dead
+PROGRESS_INTERVAL = 1.0  # seconds between progress writes
+STALE_CHECK_INTERVAL = 60.0  # seconds between requeue_stale_jobs runs in each worker
+
+ACTIVE_STATUSES = (PdfIngestionJob.STATUS_PENDING, PdfIngestionJob.STATUS_RUNNING)
+# A course with a job in one of these is skipped by claim_next_job.
+BUSY_STATUSES = (PdfIngestionJob.STATUS_RUNNING, PdfIngestionJob.STATUS_SUPERSEDED)
+SUPERSEDED_ERROR = "Superseded by a newer upload."
+
+
+class IngestionSuperseded(Exception):
+    """Raised inside a job whose course PDF was replaced while it ran."""
+
+
+def enqueue_course_pdf(course):
+    """
+    Queues extraction of the course's current PDF and returns the job.
+    Pending jobs for an older file are cancelled and running ones marked
+    superseded; an active job for the same file is reused instead of
+    queuing a duplicate.
+    """
+    pdf_name = course.pdfs.name
+    active = PdfIngestionJob.objects.filter(course=course, status__in=ACTIVE_STATUSES)
+
+    existing = active.filter(pdf_name=pdf_name).first()
+    if existing:
+        return existing
+
+    active.filter(status=PdfIngestionJob.STATUS_PENDING).update(
+        status=PdfIngestionJob.STATUS_CANCELLED,
+        error=SUPERSEDED_ERROR,
+        finished_at=timezone.now(),
+    )
+    active.filter(status=PdfIngestionJob.STATUS_RUNNING).update(
+        status=PdfIngestionJob.STATUS_SUPERSEDED, error=SUPERSEDED_ERROR, updated_at=timezone.now()
+    )
+    job = PdfIngestionJob.objects.create(course=course, pdf_name=pdf_name, max_attempts=MAX_ATTEMPTS)
+    logger.info(f"Queued ingestion job {job.pk} for course {course.pk} ({pdf_name})")
+    return job
+
+
+def image_changed(field_file, previous_name):
+    """
+    Called after an image field was saved: deletes the variants of the image
+    it replaced and queues variants for the new one.
+    """
+    name = field_file.name if field_file else ''
+    if (previous_name or '') == name:
+        return
+    if previous_name:
+        delete_derivatives(field_file.storage, previous_name)
+    if name:
+        enqueue_image_derivatives(name)
+
+
+def enqueue_image_derivatives(image_name):
+    """Queues variant generation for a stored image, unless it is already pending."""
+    job = ImageDerivativeJob.objects.filter(image_name=image_name, status=ImageDerivativeJob.STATUS_PENDING).first()
+    return job or ImageDerivativeJob.objects.create(image_name=image_name, max_attempts=MAX_ATTEMPTS)
+
+
+def requeue_stale_jobs():
+    """
+    Puts jobs whose worker died mid-run back in the queue. A job that has
+    used all its attempts fails instead, so one that crashes its worker
+    isn't retried forever.
+    """
+    cutoff = timezone.now() - timedelta(seconds=JOB_TIMEOUT)
+    count = 0
+    failed = 0
+    for model in (PdfIngestionJob, ImageDerivativeJob):
+        stale = model.objects.filter(status=model.STATUS_RUNNING, started_at__lt=cutoff)
+        count += stale.filter(attempts__lt=F('max_attempts')).update(
+            status=model.STATUS_PENDING, available_at=timezone.now()
+        )
+        failed += stale.update(
+            status=model.STATUS_FAILED, error="Worker stopped before finishing.", finished_at=timezone.now()
+        )
+    # A superseded job whose worker died would block its course forever.
+    count += PdfIngestionJob.objects.filter(
+        status=PdfIngestionJob.STATUS_SUPERSEDED, started_at__lt=cutoff
+    ).update(status=PdfIngestionJob.STATUS_CANCELLED, finished_at=timezone.now())
+    count += ChunkedUpload.objects.filter(
+        status=ChunkedUpload.STATUS_PROCESSING, updated_at__lt=cutoff
+    ).update(status=ChunkedUpload.STATUS_VERIFYING, updated_at=timezone.now())
+    if count:
+        logger.warning(f"Requeued {count} stale ingestion job(s).")
+    if failed:
+        logger.warning(f"Failed {failed} stale ingestion job(s) out of attempts.")
+    return count
+
+
+def _claim(model, exclude=None, **reset):
+    now = timezone.now()
+    pending = model.objects.filter(status=model.STATUS_PENDING, attempts__lt=F('max_attempts'))
+    if exclude is not None:
+        pending = pending.exclude(exclude)
+    candidates = list(
+        pending.filter(available_at__lte=now)
+        .order_by('available_at', 'id')
+        .values_list('id', flat=True)[:10]
+    )
+    for job_id in candidates:
+        # The exclusion is repeated in the UPDATE, so it holds against a
+        # job claimed by another worker since the candidates were read.
+        claimed = pending.filter(id=job_id).update(
+            status=model.STATUS_RUNNING,
+            attempts=F('attempts') + 1,
+            started_at=now,
+            updated_at=now,
+            **reset,
+        )
+        if claimed:
+            return job_id
+    return None
+
+
+def claim_next_job():
+    """
+    Atomically moves the oldest available pending job to running and returns
+    it, or None if the queue is empty. The conditional UPDATE makes sure two
+    workers never claim the same job, nor two jobs of the same course.
+    """
+    busy = PdfIngestionJob.objects.filter(course=OuterRef('course'), status__in=BUSY_STATUSES)
+    job_id = _claim(PdfIngestionJob, exclude=Exists(busy), pages_done=0)
+    return PdfIngestionJob.objects.select_related('course').get(id=job_id) if job_id else None
+
+
+def claim_next_image_job():
+    """claim_next_job for ImageDerivativeJobs."""
+    job_id = _claim(ImageDerivativeJob)
+    return ImageDerivativeJob.objects.get(id=job_id) if job_id else None
+
+
+def _timed(iterable, timer):
+    """Yields from iterable, adding the time spent producing items to timer[0]."""
+    iterator = iter(iterable)
+    while True:
+        started = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            timer[0] += time.perf_counter() - started
+            return
+        timer[0] += time.perf_counter() - started
+        yield item
+
+
+def _rate(count, seconds):
+    return round(count / seconds, 1) if count and seconds > 0 else None
+
+
+def ingest_course_pdf(course, progress_callback=None, check_current=None):
+    """
+    Extracts the course PDF and replaces its CoursePdfInternal/CourseSection
+    rows, bulk-saving sections in batches as the extractor completes them.
+    Results are reused from the extraction cache when the same bytes were
+    processed before. Stage timings are stored as a PdfExtractionStats row.
+    check_current(), if given, is called before sections and metadata are
+    written and raises IngestionSuperseded to abandon the run.
+    Raises on extraction errors so the caller can retry.
+    """
+    check_current = check_current or (lambda: None)
+    logger.info(f"Starting PDF processing for course: {course.title} (ID: {course.pk})")
+    started = time.perf_counter()
+    pdf_data_instance, created = CoursePdfInternal.objects.get_or_create(course=course)
+
+    # Re-uploads of the same bytes get a new file name but need no work.
+    digest = file_sha256(course.pdf_path)
+    if not created and pdf_data_instance.content_sha256 == digest:
+        logger.info(f"PDF content unchanged for course {course.pk}, skipping extraction.")
+        pdf_data_instance.name = course.pdfs.name
+        pdf_data_instance.save(update_fields=['name'])
+        return pdf_data_instance
+
+    stats = ExtractionStats()
+    sections = extraction_cache.get_sections(digest)
+    from_cache = sections is not None
+    if sections is None:
+        sections = extraction_cache.caching_sections(
+            digest, course.iter_pdf_sections(progress_callback=progress_callback, stats=stats)
+        )
+
+    # On re-upload only sections whose content changed are rewritten.
+    diff = not created and getattr(settings, 'PDF_INGESTION_DIFF_SECTIONS', True)
+    extract_timer = [0.0]  # Time spent waiting on the extractor while saving
+    save_started = time.perf_counter()
+    check_current()
+    toc, counts = save_sections(pdf_data_instance, _timed(sections, extract_timer), diff=diff)
+    persist_seconds = time.perf_counter() - save_started - extract_timer[0]
+    logger.info(
+        f"Saved {len(toc)} sections ({counts['created']} created, {counts['updated']} updated, "
+        f"{counts['unchanged']} unchanged, {counts['deleted']} deleted)."
+    )
+
+    check_current()
+    # Update CoursePdfInternal fields
+    pdf_data_instance.name = course.pdfs.name
+    pdf_data_instance.table_of_contents = toc
+    pdf_data_instance.content_sha256 = digest
+    pdf_data_instance.save()  # Save name and toc
+
+    extract_seconds = extract_timer[0]
+    record = PdfExtractionStats.objects.create(
+        pdf_data=pdf_data_instance,
+        pdf_name=course.pdfs.name,
+        from_cache=from_cache,
+        workers=stats.workers,
+        pages=stats.pages,
+        blocks=stats.blocks,
+        sections=len(toc),
+        open_seconds=stats.open_seconds,
+        get_text_seconds=stats.get_text_seconds,
+        classify_seconds=stats.classify_seconds,
+        extract_seconds=extract_seconds,
+        persist_seconds=persist_seconds,
+        total_seconds=time.perf_counter() - started,
+        pages_per_second=_rate(stats.pages, extract_seconds),
+        blocks_per_second=_rate(stats.blocks, extract_seconds),
+    )
+    logger.info(
+        f"Successfully processed and saved sections for course: {course.title} in {record.total_seconds:.2f}s "
+        f"(open {stats.open_seconds:.3f}s, get_text {stats.get_text_seconds:.3f}s, "
+        f"classify {stats.classify_seconds:.3f}s, persist {persist_seconds:.3f}s, "
+        f"{stats.pages} pages, {stats.blocks} blocks{', cached' if from_cache else ''})"
+    )
+    return pdf_data_instance
+
+
+def run_job(job):
+    """Runs a claimed job to completion, recording success, retry or failure."""
+    course = Course.objects.filter(pk=job.course_id).first()
+    if course is None or not course.pdfs or course.file_type != 'pdf' or course.pdfs.name != job.pdf_name:
+        _finish(job, PdfIngestionJob.STATUS_CANCELLED, error="Course PDF changed or removed before processing.")
+        return
+
+    last_write = [0.0]
+
+    def check_current():
+        if _superseded(job):
+            raise IngestionSuperseded()
+
+    def report_progress(pages_done, pages_total):
+        now = time.monotonic()
+        if pages_done == pages_total or now - last_write[0] >= PROGRESS_INTERVAL:
+            check_current()
+            PdfIngestionJob.objects.filter(pk=job.pk).update(
+                pages_done=pages_done, pages_total=pages_total, updated_at=timezone.now()
+            )
+            last_write[0] = now
+
+    try:
+        ingest_course_pdf(course, progress_callback=report_progress, check_current=check_current)
+    except IngestionSuperseded:
+        logger.info(f"Ingestion job {job.pk} stopped: course {course.pk} has a newer PDF.")
+        _finish(job, PdfIngestionJob.STATUS_CANCELLED, error=SUPERSEDED_ERROR)
+        return
+    except Exception as e:
+        if _superseded(job):
+            _finish(job, PdfIngestionJob.STATUS_CANCELLED, error=SUPERSEDED_ERROR)
+            return
+        logger.error(f"Ingestion job {job.pk} failed (attempt {job.attempts}/{job.max_attempts}): {e}", exc_info=True)
+        _retry_or_fail(job, e)
+        return
+
+    _finish(job, PdfIngestionJob.STATUS_SUCCEEDED)
+
+
+def _superseded(job):
+    """True once the job was marked superseded or its course no longer has the job's PDF."""
+    running = PdfIngestionJob.objects.filter(pk=job.pk, status=PdfIngestionJob.STATUS_RUNNING).exists()
+    return not running or not Course.objects.filter(pk=job.course_id, pdfs=job.pdf_name).exists()
+
+
+def run_image_job(job):
+    """Writes the variants of a claimed ImageDerivativeJob's image."""
+    if not default_storage.exists(job.image_name):
+        _finish(job, ImageDerivativeJob.STATUS_FAILED, error="Image no longer exists.")
+        return
+    try:
+        write_derivatives(default_storage, job.image_name)
+    except Exception as e:
+        logger.error(f"Image job {job.pk} for {job.image_name} failed: {e}", exc_info=True)
+        _retry_or_fail(job, e)
+        return
+    _finish(job, ImageDerivativeJob.STATUS_SUCCEEDED)
+
+
+def _retry_or_fail(job, error):
+    model = type(job)
+    if job.attempts < job.max_attempts:
+        delay = RETRY_DELAY * 2 ** (job.attempts - 1)
+        model.objects.filter(pk=job.pk).update(
+            status=model.STATUS_PENDING,
+            error=str(error),
+            available_at=timezone.now() + timedelta(seconds=delay),
+            updated_at=timezone.now(),
+        )
+    else:
+        _finish(job, model.STATUS_FAILED, error=str(error))
+
+
+def _finish(job, status, error=''):
+    now = timezone.now()
+    type(job).objects.filter(pk=job.pk).update(status=status, error=error, finished_at=now, updated_at=now)
+
+
+def work(poll_interval=2.0, once=False):
+    """
+    Worker loop: claims and runs jobs until interrupted, requeuing jobs of
+    dead workers every STALE_CHECK_INTERVAL. With once=True the worker exits
+    as soon as the queue is empty.
+    """
+    # Each worker process opens its own database connections.
+    connections.close_all()
+    last_stale_check = None
+    while True:
+        if last_stale_check is None or time.monotonic() - last_stale_check >= STALE_CHECK_INTERVAL:
+            requeue_stale_jobs()
+            last_stale_check = time.monotonic()
+        image_job = claim_next_image_job()
+        if image_job is not None:
+            run_image_job(image_job)
+            continue
+        upload = claim_next_upload()
+        if upload is not None:
+            verify_upload(upload)
+            continue
+        job = claim_next_job()
+        if job is None:
+            if once:
+                return
+            time.sleep(poll_interval)
+            continue
+        logger.info(f"Running ingestion job {job.pk} for course {job.course_id}")
+        run_job(job)
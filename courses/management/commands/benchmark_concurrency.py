@@ -0,0 +1,91 @@
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from courses.benchmark import build_dataset
+from courses.concurrency_benchmark import run_asgi, run_wsgi
+
+# name -> (sync path, async path, needs a JWT)
+ENDPOINTS = {
+    'courses': ('/courses/', '/courses/api/async/courses/', False),
+    'course': ('/courses/{course}/', '/courses/api/async/courses/{course}/', False),
+    'categories': ('/courses/categories/', '/courses/api/async/categories/', False),
+    'reviews': ('/courses/api/reviews/{course}/', '/courses/api/async/reviews/{course}/', False),
+    'my_courses': ('/courses/api/enroll/my-courses/', '/courses/api/async/my-courses/', True),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares how many concurrent slow clients one process serves with the sync views under WSGI "
+        "threads, the sync views under ASGI and the async views under ASGI. Prints JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=50, help="Simultaneous clients per scenario.")
+        parser.add_argument('--client-delay', type=float, default=0.2,
+                            help="Seconds each client takes to read a response.")
+        parser.add_argument('--threads', type=int, default=4, help="Worker threads of the WSGI scenario.")
+        parser.add_argument('--endpoints', nargs='*', choices=sorted(ENDPOINTS), default=sorted(ENDPOINTS))
+        parser.add_argument('--courses', type=int, default=50, help="Courses in the synthetic dataset.")
+        parser.add_argument('--output', help="Write the JSON results to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            # The catalog response cache would let the sync views skip their work,
+            # and the version bumps of the dataset must not reach the live caches.
+            caches = {
+                alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'benchmark-{alias}'}
+                for alias in settings.CACHES
+            }
+            caches['catalog'] = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+            with override_settings(CACHES=caches, METRICS_SLOW_REQUEST_MS=None):
+                results = self._run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + "\n")
+            self.stderr.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def _run(self, options):
+        dataset = build_dataset(courses=options['courses'], students=20, enrollments=10, quizzes=1)
+        token = f"Bearer {RefreshToken.for_user(type(dataset['professor'])(pk=dataset['students'][0])).access_token}"
+        clients, delay, threads = options['clients'], options['client_delay'], options['threads']
+
+        endpoints = {}
+        for name in options['endpoints']:
+            sync_path, async_path, needs_auth = ENDPOINTS[name]
+            sync_path = sync_path.format(course=dataset['courses'][0])
+            async_path = async_path.format(course=dataset['courses'][0])
+            headers = {'Authorization': token} if needs_auth else None
+            endpoints[name] = {
+                'wsgi_sync': run_wsgi(sync_path, clients, threads, delay, headers),
+                'asgi_sync': run_asgi(sync_path, clients, delay, headers),
+                'asgi_async': run_asgi(async_path, clients, delay, headers),
+            }
+            summary = ", ".join(
+                f"{scenario} {result['wall_seconds']}s (p95 {result['latency_ms']['p95']} ms)"
+                for scenario, result in endpoints[name].items()
+            )
+            self.stderr.write(f"{name}: {summary}")
+
+        return {
+            'meta': {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'), 'database': connection.vendor},
+            'clients': clients,
+            'client_delay_seconds': delay,
+            'wsgi_threads': threads,
+            'endpoints': endpoints,
+        }
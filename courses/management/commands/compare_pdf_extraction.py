@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.extraction import extract_sections
+
+
+class Command(BaseCommand):
+    help = "Extracts a PDF serially and with a process pool, and checks both produce identical sections."
+
+    def add_arguments(self, parser):
+        parser.add_argument('pdf', help="Path to the PDF file.")
+        parser.add_argument('--workers', type=int, default=4, help="Process count for the parallel run.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        serial = extract_sections(options['pdf'], workers=1)
+        serial_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        parallel = extract_sections(options['pdf'], workers=options['workers'])
+        parallel_time = time.perf_counter() - start
+
+        self.stdout.write(f"serial:   {len(serial[0])} sections in {serial_time:.3f}s")
+        self.stdout.write(f"parallel: {len(parallel[0])} sections in {parallel_time:.3f}s ({options['workers']} workers)")
+        if serial != parallel:
+            raise CommandError("Parallel extraction output differs from the serial path.")
+        self.stdout.write(self.style.SUCCESS("Outputs are identical."))
@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from courses.models import Category, Course
+from intellectra.imaging import generate_derivatives
+
+
+class Command(BaseCommand):
+    help = "Generates resized image variants for existing course images, category images and avatars."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help="Regenerate variants even if they already exist (e.g. after changing the widths).",
+        )
+
+    def handle(self, *args, **options):
+        targets = [
+            (Course, 'image'),
+            (Category, 'categoryImage'),
+            (get_user_model(), 'avatar'),
+        ]
+        for model, field_name in targets:
+            processed = failed = 0
+            queryset = model.objects.exclude(**{field_name: ''}).exclude(**{f"{field_name}__isnull": True})
+            for instance in queryset.only('pk', field_name).iterator():
+                field_file = getattr(instance, field_name)
+                try:
+                    if generate_derivatives(field_file, force=options['force']):
+                        processed += 1
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"{model.__name__} {instance.pk} ({field_file.name}): {e}")
+            self.stdout.write(f"{model.__name__}.{field_name}: {processed} generated, {failed} failed.")
+        self.stdout.write(self.style.SUCCESS("Image derivatives are up to date."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from courses.uploads import EXPIRY_HOURS, purge_stale_uploads
+
+
+class Command(BaseCommand):
+    help = "Deletes unfinished chunked uploads (and their temporary files) idle for longer than UPLOAD_EXPIRY_HOURS."
+
+    def handle(self, *args, **options):
+        count = purge_stale_uploads()
+        self.stdout.write(self.style.SUCCESS(f"Removed {count} upload(s) idle for more than {EXPIRY_HOURS} hours."))
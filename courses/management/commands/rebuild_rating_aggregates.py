@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from courses.ratings import rebuild_all
+
+
+class Command(BaseCommand):
+    help = "Recomputes course review counts, averages and rating histograms from the Review table."
+
+    def handle(self, *args, **options):
+        count = rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rating aggregates for {count} courses."))
@@ -0,0 +1,83 @@
+import asyncio
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.replay import load_requests, replay, summarize
+
+
+class Command(BaseCommand):
+    help = (
+        "Replays a JSON-lines request log against a running server at a given concurrency and rate, "
+        "and reports latency percentiles and error rates per endpoint as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('log', help="JSON-lines request log, or - for stdin.")
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000', help="Server to send requests to.")
+        parser.add_argument('--concurrency', type=int, default=10, help="Requests in flight (one connection each).")
+        parser.add_argument('--rate', type=float, default=0, help="Requests per second; 0 sends as fast as possible.")
+        parser.add_argument('--repeat', type=int, default=1, help="Times to replay the whole log.")
+        parser.add_argument('--limit', type=int, help="Only replay the first N requests of the log.")
+        parser.add_argument('--timeout', type=float, default=30.0, help="Per-request timeout in seconds.")
+        parser.add_argument(
+            '--header', action='append', default=[],
+            help="Extra header for every request, e.g. --header 'Authorization: Bearer ...'.",
+        )
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        if options['log'] == '-':
+            requests, skipped = load_requests(sys.stdin)
+        else:
+            try:
+                with open(options['log'], encoding='utf-8') as f:
+                    requests, skipped = load_requests(f)
+            except OSError as e:
+                raise CommandError(f"Cannot read {options['log']}: {e}")
+        if options['limit']:
+            requests = requests[:options['limit']]
+        requests = requests * max(1, options['repeat'])
+        if not requests:
+            raise CommandError(f"No replayable requests found ({skipped} line(s) skipped).")
+
+        headers = {}
+        for header in options['header']:
+            name, sep, value = header.partition(':')
+            if not sep:
+                raise CommandError(f"Invalid header {header!r}, expected 'Name: value'.")
+            headers[name.strip()] = value.strip()
+
+        concurrency = max(1, options['concurrency'])
+        self.stderr.write(
+            f"Replaying {len(requests)} request(s) against {options['base_url']} "
+            f"(concurrency {concurrency}, rate {options['rate'] or 'unlimited'}); {skipped} line(s) skipped."
+        )
+        results, wall_seconds = asyncio.run(replay(
+            requests, options['base_url'], concurrency=concurrency, rate=options['rate'] or None,
+            timeout=options['timeout'], headers=headers,
+        ))
+
+        report = {
+            'base_url': options['base_url'],
+            'concurrency': concurrency,
+            'rate': options['rate'] or None,
+            'skipped_lines': skipped,
+            'wall_seconds': round(wall_seconds, 3),
+            **summarize(results, wall_seconds),
+        }
+        for endpoint, summary in report['endpoints'].items():
+            latency = summary['latency_ms']
+            self.stderr.write(
+                f"{endpoint}: {summary['requests']} req, p50 {latency['p50']} ms, p95 {latency['p95']} ms, "
+                f"p99 {latency['p99']} ms, errors {summary['error_rate']:.1%}"
+            )
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + "\n")
+            self.stderr.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(output)
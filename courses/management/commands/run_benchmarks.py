@@ -0,0 +1,119 @@
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from courses import extraction_cache
+from courses.benchmark import benchmark_ingestion, build_dataset, endpoint_scenarios, make_pdf, measure
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True, timeout=5,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Builds a synthetic dataset in a throwaway test database and benchmarks the main endpoints "
+        "and PDF ingestion. Prints (or writes) the results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--courses', type=int, default=1000)
+        parser.add_argument('--sections', type=int, default=20, help="Sections per course.")
+        parser.add_argument('--reviews', type=int, default=10, help="Reviews per course.")
+        parser.add_argument('--students', type=int, default=200)
+        parser.add_argument('--enrollments', type=int, default=20, help="Enrollments per student.")
+        parser.add_argument('--quizzes', type=int, default=50)
+        parser.add_argument('--questions', type=int, default=10, help="Questions per quiz.")
+        parser.add_argument('--pdf-pages', type=int, default=200, help="Pages of the generated PDF; 0 skips ingestion.")
+        parser.add_argument('--requests', type=int, default=20, help="Timed requests per endpoint.")
+        parser.add_argument('--only', nargs='*', help="Endpoint scenarios to run (default: all).")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Write the JSON results to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        media_root = tempfile.mkdtemp(prefix='benchmark-media-')
+        cache_dir = extraction_cache.CACHE_DIR
+        # A warm extraction cache from an earlier run would hide the extractor's cost.
+        extraction_cache.CACHE_DIR = os.path.join(media_root, 'extraction-cache')
+        # Like the database, caches are swapped for throwaway ones: the version
+        # bumps made while building the dataset would otherwise invalidate the
+        # live catalog and quiz caches in the shared file-based cache.
+        caches = {
+            alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'benchmark-{alias}'}
+            for alias in settings.CACHES
+        }
+        try:
+            with override_settings(MEDIA_ROOT=media_root, CACHES=caches):
+                results = self._run(options, media_root)
+        finally:
+            extraction_cache.CACHE_DIR = cache_dir
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + "\n")
+            self.stderr.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def _run(self, options, media_root):
+        scale = {
+            name: options[name]
+            for name in ('courses', 'sections', 'reviews', 'students', 'enrollments', 'quizzes', 'questions', 'seed')
+        }
+        if options['courses'] < 1 or options['students'] < 1 or options['quizzes'] < 1:
+            raise CommandError("--courses, --students and --quizzes must be at least 1.")
+
+        started = time.perf_counter()
+        dataset = build_dataset(**scale)
+        build_seconds = time.perf_counter() - started
+        self.stderr.write(f"Dataset built in {build_seconds:.1f}s.")
+
+        endpoints = {}
+        for name, action, before in endpoint_scenarios(dataset):
+            if options['only'] and name not in options['only']:
+                continue
+            endpoints[name] = measure(action, options['requests'], before=before)
+            latency = endpoints[name]['latency_ms']
+            self.stderr.write(f"{name}: p50 {latency['p50']} ms, p95 {latency['p95']} ms")
+
+        ingestion = None
+        if options['pdf_pages'] > 0:
+            pdf_name = f"courses/pdfs/benchmark-{options['pdf_pages']}p.pdf"
+            pdf_path = os.path.join(media_root, pdf_name)
+            os.makedirs(os.path.dirname(pdf_path), exist_ok=True)
+            make_pdf(pdf_path, options['pdf_pages'])
+            ingestion = benchmark_ingestion(pdf_path, pdf_name, dataset['professor'], dataset['category'])
+            self.stderr.write(f"ingestion: {ingestion['seconds']}s for {ingestion['pages']} pages")
+
+        return {
+            'meta': {
+                'commit': _git_commit(),
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+            },
+            'scale': {**scale, 'pdf_pages': options['pdf_pages'], 'requests': options['requests']},
+            'dataset_build_seconds': round(build_seconds, 2),
+            'endpoints': endpoints,
+            'ingestion': ingestion,
+        }
@@ -0,0 +1,62 @@
+import multiprocessing
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from courses.ingestion import work
+
+
+def _worker_main(poll_interval, once):
+    django.setup()
+    work(poll_interval=poll_interval, once=once)
+
+
+class Command(BaseCommand):
+    help = "Runs a pool of worker processes that extract queued course PDFs, resize uploaded images and verify chunked uploads."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=getattr(settings, 'PDF_INGESTION_WORKERS', 2),
+            help="Number of worker processes.",
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=getattr(settings, 'PDF_INGESTION_POLL_INTERVAL', 2.0),
+            help="Seconds to wait before polling an empty queue again.",
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Exit once the queue is drained instead of polling forever.",
+        )
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+
+        if workers == 1:
+            self.stdout.write("Starting 1 ingestion worker in-process.")
+            work(poll_interval=options['poll_interval'], once=options['once'])
+            return
+
+        # Children must not inherit the parent's open database connections.
+        connections.close_all()
+        methods = multiprocessing.get_all_start_methods()
+        ctx = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        # Not daemonic: each worker may start its own page-extraction pool.
+        processes = [
+            ctx.Process(target=_worker_main, args=(options['poll_interval'], options['once']))
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(f"Started {workers} ingestion workers.")
+
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join()
+        self.stdout.write("Ingestion workers stopped.")
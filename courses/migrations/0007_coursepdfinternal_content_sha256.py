@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_coursesection_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coursepdfinternal',
+            name='content_sha256',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
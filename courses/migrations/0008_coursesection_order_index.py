@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0007_coursepdfinternal_content_sha256'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='coursesection',
+            index=models.Index(fields=['pdf_data', 'order'], name='courses_cou_pdf_dat_802df0_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+def create_fts_index(apps, schema_editor):
+    # FTS5 is SQLite-only; other databases use the ORM fallback backend.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS courses_section_fts USING fts5("
+        "title, content, course_id UNINDEXED, pdf_data_id UNINDEXED, "
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        "INSERT INTO courses_section_fts (rowid, title, content, course_id, pdf_data_id) "
+        "SELECT s.id, s.title, s.content, p.course_id, p.id "
+        "FROM courses_coursesection s JOIN courses_coursepdfinternal p ON p.id = s.pdf_data_id"
+    )
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS courses_section_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0008_coursesection_order_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_index, drop_fts_index),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    Review = apps.get_model('courses', 'Review')
+    CourseRatingBucket = apps.get_model('courses', 'CourseRatingBucket')
+    totals = {
+        row['cours']: row
+        for row in Review.objects.values('cours').annotate(count=models.Count('id'), total=models.Sum('note'))
+    }
+    # Courses without reviews are reset too, dropping hand-entered ratings.
+    courses = list(Course.objects.all())
+    for course in courses:
+        row = totals.get(course.id)
+        course.review_count = row['count'] if row else 0
+        course.review_sum = row['total'] if row else 0
+        course.rating = course.review_sum / course.review_count if course.review_count else 0.0
+    Course.objects.bulk_update(courses, ['review_count', 'review_sum', 'rating'])
+    CourseRatingBucket.objects.bulk_create([
+        CourseRatingBucket(course_id=row['cours'], note=row['note'], count=row['count'])
+        for row in Review.objects.values('cours', 'note').annotate(count=models.Count('id'))
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0009_section_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseRatingBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('note', models.IntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='review_sum',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['rating'], name='courses_cou_rating_b9c925_idx'),
+        ),
+        migrations.AddField(
+            model_name='courseratingbucket',
+            name='course',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rating_buckets', to='courses.course'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='courseratingbucket',
+            unique_together={('course', 'note')},
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0012_chunkedupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PdfExtractionStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pdf_name', models.CharField(max_length=512)),
+                ('from_cache', models.BooleanField(default=False)),
+                ('workers', models.PositiveSmallIntegerField(default=1)),
+                ('pages', models.PositiveIntegerField(default=0)),
+                ('blocks', models.PositiveIntegerField(default=0)),
+                ('sections', models.PositiveIntegerField(default=0)),
+                ('open_seconds', models.FloatField(default=0.0)),
+                ('get_text_seconds', models.FloatField(default=0.0)),
+                ('classify_seconds', models.FloatField(default=0.0)),
+                ('extract_seconds', models.FloatField(default=0.0)),
+                ('persist_seconds', models.FloatField(default=0.0)),
+                ('total_seconds', models.FloatField(default=0.0)),
+                ('pages_per_second', models.FloatField(blank=True, null=True)),
+                ('blocks_per_second', models.FloatField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('pdf_data', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='extraction_stats', to='courses.coursepdfinternal')),
+            ],
+            options={
+                'verbose_name_plural': 'PDF extraction stats',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['created_at', 'total_seconds'], name='courses_pdf_created_d3acba_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:55
+
+from django.db import migrations, models
+
+
+def reset_unreviewed_ratings(apps, schema_editor):
+    # 0010 only backfilled courses with reviews; the rest kept their
+    # hand-entered rating, which rebuild_rating_aggregates would reset.
+    Course = apps.get_model('courses', 'Course')
+    Course.objects.filter(reviews__isnull=True).update(review_count=0, review_sum=0, rating=0.0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0013_pdfextractionstats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='course',
+            name='rating',
+            field=models.FloatField(default=0.0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='course',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='course',
+            name='review_sum',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(reset_unreviewed_ratings, migrations.RunPython.noop),
+    ]
@@ -1,15 +1,16 @@
 # models.py
 import os
 import json
-import re # Import regex
-import fitz  # PyMuPDF
-from django.db import models
+import uuid
+from django.db import models, transaction
+from django.utils import timezone
 from django.contrib.auth.models import User
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db.models.signals import pre_save, pre_delete, post_save, post_delete
 from django.dispatch import receiver
 import logging # Import the logging library
+from .extraction import extract_sections, stream_sections
 
 # Get an instance of the logger we configured in settings.py
 logger = logging.getLogger('courses.extraction')
@@ -32,84 +33,76 @@ class Course(models.Model):
     image = models.ImageField(upload_to='images/', null=True, blank=True)
     file_type = models.CharField(max_length=50, choices=[('pdf', 'PDF'), ('video', 'Video')], default='video')
     duration = models.CharField(max_length=20, blank=True)
-    rating = models.FloatField(default=0.0)
+    rating = models.FloatField(default=0.0, editable=False)  # Average review note, maintained by courses/ratings.py
+    # Denormalized review aggregates, updated incrementally on review changes
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    review_sum = models.IntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     professor = models.ForeignKey(User, on_delete=models.CASCADE)
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
     # Removed _original_file_name, CoursePdfInternal handles this now
     # Note: The OneToOneField to CoursePdfInternal is added implicitly by the relation
 
+    class Meta:
+        indexes = [models.Index(fields=['rating'])]  # Catalog sorting
+
+    # Only ever written by courses/ratings.py, with in-database increments.
+    AGGREGATE_FIELDS = ('rating', 'review_count', 'review_sum')
+
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # A full save of a loaded course would write back the aggregates as
+        # they were when it was read, losing reviews counted since then.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.AGGREGATE_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     # --- Updated PDF Extraction Logic ---
-    def extract_data_from_pdf(self):
+    def extract_data_from_pdf(self, progress_callback=None, raise_errors=False, workers=None, stats=None):
         """
         Extracts structured sections (title, content) and a table of contents
         from the PDF file, prioritizing embedded TOC if available.
+        progress_callback(pages_done, pages_total) is called as pages are read.
+        workers sets the page-extraction process count (see courses/extraction.py).
+        stats, an extraction.ExtractionStats, collects per-stage timings.
+        Errors are logged and swallowed unless raise_errors is True.
         Returns: tuple(list_of_sections, list_of_toc_entries)
         """
         if not self.pdfs or self.file_type != 'pdf':
             logger.debug(f"Extraction skipped for {getattr(self.pdfs, 'name', 'N/A')}: Not a PDF or no file.")
             return [], []
 
-        sections = []
-        toc = []
-        seen_titles = set()  # To track titles that have already been added
-        current_section_data = None
-        section_order = 0
-        MAIN_HEADING_PATTERN = re.compile(r"^(?:[IVXLCDM]+\.|[A-Z]\.|[0-9]+\.)\s+.{3,}", re.IGNORECASE)
-        SUB_HEADING_PATTERN = re.compile(r"^(?:[a-z]\.|[0-9]+\.[0-9]+(?:\.[0-9]+)*)\s+.{3,}", re.IGNORECASE)
-
+        file_path = None
         try:
             file_path = os.path.join(settings.MEDIA_ROOT, self.pdfs.name)
-            doc = fitz.open(file_path)
-
-            # --- Attempt to extract sections ---
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                blocks = page.get_text("blocks", sort=True)
-                for b in blocks:
-                    block_text = b[4].strip()
-                    lines = block_text.split('\n')
-                    if not lines: continue
-                    first_line = lines[0].strip()
-
-                    # Check if the first line is a potential title
-                    is_potential_title = False
-                    title_text = first_line
-                    is_main_heading = MAIN_HEADING_PATTERN.match(first_line)
-                    is_sub_heading = SUB_HEADING_PATTERN.match(first_line)
-
-                    if is_main_heading and not is_sub_heading:
-                        is_potential_title = True
-
-                    # If it's a potential title and not seen before
-                    if is_potential_title and title_text not in seen_titles:
-                        if current_section_data:
-                            sections.append(current_section_data)  # Save the previous section
-                        current_section_data = {
-                            'title': title_text,
-                            'content': "\n".join(lines[1:]),  # Start new section content
-                            'order': section_order
-                        }
-                        toc.append({'title': title_text, 'order': section_order})
-                        seen_titles.add(title_text)  # Add title to the set
-                        section_order += 1
-                    elif current_section_data:
-                        current_section_data['content'] += block_text + "\n"  # Append to current section
-
-            # Append the last section if it exists
-            if current_section_data:
-                sections.append(current_section_data)
-
+            sections, toc = extract_sections(
+                file_path, workers=workers, progress_callback=progress_callback, stats=stats
+            )
             logger.info(f"Successfully extracted {len(sections)} sections.")
             return sections, toc
 
         except Exception as e:
             logger.error(f"Error processing PDF {file_path or getattr(self.pdfs, 'name', 'N/A')}: {e}", exc_info=True)
+            if raise_errors:
+                raise
             return [], []
 
+    def iter_pdf_sections(self, progress_callback=None, workers=None, stats=None):
+        """
+        Lazily yields extracted sections one at a time so they can be saved
+        as they complete. Unlike extract_data_from_pdf, errors propagate.
+        """
+        return stream_sections(self.pdf_path, workers=workers, progress_callback=progress_callback, stats=stats)
+
+    @property
+    def pdf_path(self):
+        return os.path.join(settings.MEDIA_ROOT, self.pdfs.name)
+
 # --- Signal Receiver (Refactored) ---
 
 class Quiz(models.Model):
@@ -155,6 +148,8 @@ class CoursePdfInternal(models.Model):
     name = models.CharField(max_length=512, blank=True) # Store the filename
     # Store extracted table of contents (list of titles/orders)
     table_of_contents = models.JSONField(default=list, blank=True)
+    # SHA-256 of the PDF bytes the sections were extracted from
+    content_sha256 = models.CharField(max_length=64, blank=True)
 
     def __str__(self):
         return f"Internal Data for {self.course.title} ({self.name})"
@@ -171,9 +166,12 @@ class CourseSection(models.Model):
     title = models.CharField(max_length=500)
     content = models.TextField()
     order = models.PositiveIntegerField(default=0)
+    # SHA-256 of title + content, lets re-uploads skip unchanged sections
+    content_hash = models.CharField(max_length=64, blank=True)
 
     class Meta:
         ordering = ['order']
+        indexes = [models.Index(fields=['pdf_data', 'order'])]  # Section reader range scans
 
     def __str__(self):
         # Adjust __str__ to reflect the new relationship
@@ -187,10 +185,27 @@ class Review(models.Model):
     commentaire = models.TextField()
     date_creation = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # Serves the keyset-paginated reviews feed of a course
+        indexes = [models.Index(fields=['cours', '-date_creation', '-id'])]
+
     def __str__(self):
         return f"{self.etudiant.username} - {self.cours.title} - {self.note}/5"
 
 
+class CourseRatingBucket(models.Model):
+    """Number of reviews of a course with a given note (the rating histogram)."""
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='rating_buckets')
+    note = models.IntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('course', 'note')
+
+    def __str__(self):
+        return f"{self.course.title} - {self.note}: {self.count}"
+
+
 class EnrolledCourse(models.Model):
     cours = models.ForeignKey(Course, on_delete=models.CASCADE)
     etudiant = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -203,13 +218,169 @@ class EnrolledCourse(models.Model):
         return f"{self.etudiant.username} inscrit à {self.cours.title}"
 
 
+class BackgroundJob(models.Model):
+    """
+    Status, retry and timing fields shared by the jobs the ingestion workers
+    run (see courses/ingestion.py, which claims and finishes them generically).
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now)  # Not picked up before this (retry backoff)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        abstract = True
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['status', 'available_at'])]
+
+
+class PdfIngestionJob(BackgroundJob):
+    """
+    A queued PDF extraction for a course. Jobs are created by the post_save
+    signal and consumed by `manage.py run_ingestion_workers`.
+    """
+    STATUS_CANCELLED = 'cancelled'
+    STATUS_SUPERSEDED = 'superseded'  # Running when a newer file was queued; its worker stops
+    STATUS_CHOICES = BackgroundJob.STATUS_CHOICES + [
+        (STATUS_CANCELLED, 'Cancelled'),
+        (STATUS_SUPERSEDED, 'Superseded'),
+    ]
+
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='ingestion_jobs')
+    pdf_name = models.CharField(max_length=512)  # File the job was queued for
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=BackgroundJob.STATUS_PENDING)
+    pages_done = models.PositiveIntegerField(default=0)
+    pages_total = models.PositiveIntegerField(default=0)
+
+    @property
+    def progress(self):
+        if self.status == self.STATUS_SUCCEEDED:
+            return 100.0
+        if not self.pages_total:
+            return 0.0
+        return round(100.0 * self.pages_done / self.pages_total, 1)
+
+    def __str__(self):
+        return f"Ingestion #{self.pk} for {self.course.title} ({self.status})"
+
+
+class ImageDerivativeJob(BackgroundJob):
+    """
+    Resized variants to generate for an uploaded image (see
+    intellectra/imaging.py). Queued by the image save signals and run by the
+    same workers as PdfIngestionJob, so uploads don't wait on resizing.
+    """
+    image_name = models.CharField(max_length=512)  # Storage name of the original image
+
+    def __str__(self):
+        return f"Derivatives of {self.image_name} ({self.status})"
+
+
+class PdfExtractionStats(models.Model):
+    """
+    Timings of one ingestion of a course PDF, recorded by courses/ingestion.py.
+    open/get_text/classify are the extractor stages (worker-seconds when the
+    pages were read in parallel), persist is the time spent writing sections
+    and extract the wall time spent waiting on the extractor.
+    """
+    pdf_data = models.ForeignKey(CoursePdfInternal, on_delete=models.CASCADE, related_name='extraction_stats')
+    pdf_name = models.CharField(max_length=512)
+    from_cache = models.BooleanField(default=False)  # Sections came from the extraction cache
+    workers = models.PositiveSmallIntegerField(default=1)
+    pages = models.PositiveIntegerField(default=0)
+    blocks = models.PositiveIntegerField(default=0)
+    sections = models.PositiveIntegerField(default=0)
+    open_seconds = models.FloatField(default=0.0)
+    get_text_seconds = models.FloatField(default=0.0)
+    classify_seconds = models.FloatField(default=0.0)
+    extract_seconds = models.FloatField(default=0.0)
+    persist_seconds = models.FloatField(default=0.0)
+    total_seconds = models.FloatField(default=0.0)
+    pages_per_second = models.FloatField(null=True, blank=True)
+    blocks_per_second = models.FloatField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name_plural = 'PDF extraction stats'
+        indexes = [models.Index(fields=['created_at', 'total_seconds'])]
+
+    def __str__(self):
+        return f"{self.pdf_name}: {self.total_seconds:.2f}s"
+
+
+class ChunkedUpload(models.Model):
+    """
+    A resumable upload of a course file, written chunk by chunk to a
+    temporary file under UPLOAD_TEMP_DIR, outside MEDIA_ROOT (see
+    courses/uploads.py). Completing it moves the file into place and creates
+    the Course; with a checksum, that happens in a background worker once
+    the file is verified.
+    """
+    STATUS_UPLOADING = 'uploading'
+    STATUS_VERIFYING = 'verifying'  # Queued for checksum verification
+    STATUS_PROCESSING = 'processing'  # Claimed by a worker
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_UPLOADING, 'Uploading'),
+        (STATUS_VERIFYING, 'Verifying'),
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    KIND_CHOICES = [('pdfs', 'PDF'), ('videos', 'Video')]  # Course file field the upload is for
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chunked_uploads')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()  # Total bytes announced at init
+    offset = models.BigIntegerField(default=0)  # Bytes received so far
+    sha256 = models.CharField(max_length=64, blank=True)  # Expected checksum, if given at init
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_UPLOADING)
+    course = models.ForeignKey(Course, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    course_fields = models.JSONField(default=dict, blank=True)  # Course to create once verified
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    @property
+    def temp_path(self):
+        temp_dir = getattr(settings, 'UPLOAD_TEMP_DIR', os.path.join(settings.BASE_DIR, 'cache', 'uploads'))
+        return os.path.join(temp_dir, f"{self.pk}.part")
+
+    def __str__(self):
+        return f"Upload {self.pk} of {self.filename} ({self.offset}/{self.size})"
+
+
 # No pre_save needed now
 
 @receiver(post_save, sender=Course)
 def process_course_pdf(sender, instance, created, **kwargs):
     """
-    Processes the PDF associated with a Course instance after it's saved.
-    Creates/updates CoursePdfInternal and related CourseSection objects.
+    Decides whether the PDF associated with a Course instance needs
+    (re)processing after it's saved. Extraction itself is queued as a
+    PdfIngestionJob so the request returns immediately; see courses/ingestion.py.
     """
     should_process = False
     pdf_data_instance = None
@@ -242,35 +413,94 @@ def process_course_pdf(sender, instance, created, **kwargs):
             pdf_data_instance.delete()  # Also cascades to delete sections
             return  # Stop processing
 
-    # --- Perform Processing ---
+    # --- Queue Processing ---
     if should_process:
-        logger.info(f"Starting PDF processing for course: {instance.title} (ID: {instance.pk})")
-        try:
-            # Create or get the CoursePdfInternal instance
-            if not pdf_data_instance:
-                pdf_data_instance = CoursePdfInternal.objects.create(course=instance)
-
-            # Extract data
-            extracted_sections, extracted_toc = instance.extract_data_from_pdf()
-            logger.info(f"Extracted {len(extracted_sections)} sections and {len(extracted_toc)} TOC entries.")
-
-            # Update CoursePdfInternal fields
-            pdf_data_instance.name = instance.pdfs.name
-            pdf_data_instance.table_of_contents = extracted_toc
-            pdf_data_instance.save()  # Save name and toc
-
-            # Delete old sections before creating new ones
-            pdf_data_instance.sections.all().delete()
-
-            # Create CourseSection objects linked to pdf_data_instance
-            for section_data in extracted_sections:
-                CourseSection.objects.create(
-                    pdf_data=pdf_data_instance,  # Link to the internal data object
-                    title=section_data['title'],
-                    content=section_data['content'],
-                    order=section_data['order']
-                )
-            logger.info(f"Successfully processed and saved sections for course: {instance.title}")
-        except Exception as e:
-            logger.error(f"Error in process_course_pdf signal for course {instance.pk}: {e}", exc_info=True)
-    
\ No newline at end of file
+        from .ingestion import enqueue_course_pdf
+        instance._ingestion_job = enqueue_course_pdf(instance)
+
+
+@receiver(pre_delete, sender=CoursePdfInternal)
+def remove_sections_from_search_index(sender, instance, **kwargs):
+    """
+    Keeps the search index in sync when PDF data (and its sections) goes
+    away. Runs before the delete so the section ids can still be looked up.
+    """
+    from .search import get_search_backend
+    get_search_backend().remove_document(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Quiz)
+@receiver([post_save, post_delete], sender=Question)
+@receiver([post_save, post_delete], sender=Choice)
+def invalidate_quiz_cache(sender, instance, **kwargs):
+    """Drops cached answer keys/payloads of the quiz an edited object belongs to."""
+    from .quiz_cache import quiz_cache
+    if sender is Quiz:
+        quiz_cache.invalidate(instance.pk)
+    elif sender is Question:
+        quiz_cache.invalidate(instance.quiz_id)
+    else:
+        quiz_id = Question.objects.filter(pk=instance.question_id).values_list('quiz_id', flat=True).first()
+        if quiz_id is None:
+            quiz_cache.clear()  # Question already gone; be safe
+        else:
+            quiz_cache.invalidate(quiz_id)
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_review_note(sender, instance, **kwargs):
+    """Keeps the stored course/note of an edited review so aggregates can move it."""
+    instance._previous_rating = None
+    if instance.pk:
+        instance._previous_rating = Review.objects.filter(pk=instance.pk).values_list('cours_id', 'note').first()
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_review_save(sender, instance, created, **kwargs):
+    from .ratings import add_review_note, remove_review_note
+    previous = getattr(instance, '_previous_rating', None)
+    if previous == (instance.cours_id, instance.note):
+        return
+    if previous:
+        remove_review_note(*previous)
+    add_review_note(instance.cours_id, instance.note)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_review_delete(sender, instance, **kwargs):
+    from .ratings import remove_review_note
+    remove_review_note(instance.cours_id, instance.note)
+
+
+@receiver(pre_save, sender=Course)
+@receiver(pre_save, sender=Category)
+def remember_previous_image(sender, instance, **kwargs):
+    """Keeps the stored image name of an edited course or category, to retire its variants."""
+    field_name = 'image' if sender is Course else 'categoryImage'
+    instance._previous_image_name = None
+    update_fields = kwargs.get('update_fields')
+    if instance.pk and (update_fields is None or field_name in update_fields):
+        instance._previous_image_name = sender.objects.filter(pk=instance.pk).values_list(field_name, flat=True).first()
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Category)
+def queue_image_derivatives(sender, instance, **kwargs):
+    """Queues resized variants of a newly uploaded course or category image."""
+    from .ingestion import image_changed
+    field_name = 'image' if sender is Course else 'categoryImage'
+    update_fields = kwargs.get('update_fields')
+    if update_fields is None or field_name in update_fields:
+        image_changed(getattr(instance, field_name), getattr(instance, '_previous_image_name', None))
+
+
+# Section and review rows change in bulk, so persistence.save_sections and
+# ratings bump the version once per operation instead of once per row (a
+# delete receiver here would also turn off Django's fast delete).
+@receiver([post_save, post_delete], sender=Course)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=CoursePdfInternal)
+def invalidate_catalog_cache(sender, **kwargs):
+    """Orphans every cached catalog response once the change is committed."""
+    from .response_cache import bump_version
+    transaction.on_commit(bump_version)
@@ -0,0 +1,35 @@
+from rest_framework.pagination import CursorPagination
+
+
+class StableCursorPagination(CursorPagination):
+    """
+    Cursor pagination that always ends the ordering with the primary key,
+    in the direction of the first field. Cursors store a position plus an
+    offset into rows sharing it, which only works when ties sort the same
+    way on every query (e.g. courses with equal `?ordering=-rating`).
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(super().get_ordering(request, queryset, view))
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering += ('-id' if ordering[0].startswith('-') else 'id',)
+        return ordering
+
+
+class CourseCursorPagination(StableCursorPagination):
+    """
+    Keyset pagination for the course catalog: the page cursor encodes the
+    last created_at seen, so deep pages cost the same as the first one.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+
+class ReviewCursorPagination(StableCursorPagination):
+    """Keyset pagination for a course's reviews feed, newest first."""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-date_creation', '-id')
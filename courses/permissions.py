@@ -0,0 +1,12 @@
+from rest_framework.permissions import BasePermission
+
+
+class IsProfessorOrAdmin(BasePermission):
+    """Allows professors, administrators and staff users."""
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(
+            user and user.is_authenticated
+            and (user.is_staff or getattr(user, 'role', None) in ('prof', 'admin'))
+        )
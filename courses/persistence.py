@@ -0,0 +1,120 @@
+"""
+Bulk persistence of extracted CourseSection rows.
+
+Sections are written with batched bulk_create/bulk_update, each batch in
+its own short atomic block, so the extractor runs outside any transaction
+(job progress updates commit immediately and SQLite's write lock is only
+held while a batch is flushed). Rows that no longer belong to the document
+are deleted in a final atomic block once extraction has finished; if
+extraction fails partway, the rows created by this run are deleted again so
+the document never holds two rows for one order. In diff
+mode, existing rows are matched by order and only those whose title/content
+hash changed are written, so re-processing a mostly unchanged document
+costs a handful of statements. The search index is updated for exactly the
+rows written, and the catalog cache version is bumped once per call.
+"""
+import hashlib
+
+from django.conf import settings
+from django.db import transaction
+
+from .extraction import toc_entry
+from .models import CourseSection
+from .response_cache import bump_version
+from .search import get_search_backend
+
+
+def section_hash(title, content):
+    return hashlib.sha256(f"{title}\0{content}".encode('utf-8')).hexdigest()
+
+
+def save_sections(pdf_data, sections, batch_size=None, diff=False):
+    """
+    Consumes an iterable of extracted sections and stores them as the
+    sections of pdf_data, replacing the previous ones.
+    Returns: tuple(list_of_toc_entries, dict_of_row_counts)
+    """
+    batch_size = batch_size or getattr(settings, 'COURSE_SECTION_BATCH_SIZE', 500)
+    search_backend = get_search_backend()
+    counts = {'created': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0}
+    toc = []
+    to_create = []
+    to_update = []
+    created_ids = []
+
+    def flush():
+        if not to_create and not to_update:
+            return
+        with transaction.atomic():
+            if to_create:
+                CourseSection.objects.bulk_create(to_create, batch_size=batch_size)
+                search_backend.index_sections(pdf_data, to_create)
+                created_ids.extend(section.pk for section in to_create)
+            if to_update:
+                CourseSection.objects.bulk_update(to_update, ['title', 'content', 'content_hash'], batch_size=batch_size)
+                search_backend.index_sections(pdf_data, to_update)
+        counts['created'] += len(to_create)
+        counts['updated'] += len(to_update)
+        to_create.clear()
+        to_update.clear()
+
+    # order -> (id, content_hash). Without diff every existing row is
+    # replaced, but the old rows stay readable until extraction completes.
+    # Extra rows sharing an order are always replaced.
+    existing = {}
+    replaced_ids = []
+    rows = pdf_data.sections.order_by('order', 'id').values_list('order', 'id', 'content_hash')
+    for order, pk, content_hash in rows:
+        if diff and order not in existing:
+            existing[order] = (pk, content_hash)
+        else:
+            replaced_ids.append(pk)
+
+    try:
+        for section_data in sections:
+            toc.append(toc_entry(section_data))
+            content_hash = section_hash(section_data['title'], section_data['content'])
+            section = CourseSection(
+                pdf_data=pdf_data,
+                title=section_data['title'],
+                content=section_data['content'],
+                order=section_data['order'],
+                content_hash=content_hash,
+            )
+            match = existing.pop(section_data['order'], None)
+            if match is None:
+                to_create.append(section)
+            elif match[1] == content_hash:
+                counts['unchanged'] += 1
+            else:
+                section.pk = match[0]
+                to_update.append(section)
+
+            if len(to_create) >= batch_size or len(to_update) >= batch_size:
+                flush()
+        flush()
+    except BaseException:
+        # Leave the previous rows as the only ones; a retry starts from them.
+        _delete_sections(created_ids, search_backend, batch_size)
+        if counts['updated']:
+            transaction.on_commit(bump_version)
+        raise
+
+    # Whatever is left in `existing` no longer appears in the document.
+    stale_ids = replaced_ids + [pk for pk, _ in existing.values()]
+    counts['deleted'] = _delete_sections(stale_ids, search_backend, batch_size)
+    if counts['created'] or counts['updated'] or counts['deleted']:
+        transaction.on_commit(bump_version)
+    return toc, counts
+
+
+def _delete_sections(ids, search_backend, batch_size):
+    """Deletes the given sections and their index rows in one transaction. Returns the count."""
+    count = 0
+    with transaction.atomic():
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            deleted, _ = CourseSection.objects.filter(id__in=batch).delete()
+            search_backend.remove_sections(batch)
+            count += deleted
+    return count
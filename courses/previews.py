@@ -0,0 +1,139 @@
+"""
+Rendered page previews of course PDFs.
+
+Pages are rasterized with PyMuPDF in a small process pool and written to an
+on-disk cache keyed by the PDF's SHA-256, the page, the DPI and the image
+format, so only the first request for a given rendering pays for it; later
+ones are a file read. Requested DPIs are snapped to the few values in
+PDF_PREVIEW_DPIS, so each page has a bounded number of renderings, and
+the least recently used files are evicted once the cache exceeds
+PDF_PREVIEW_CACHE_MAX_BYTES. Like courses/extraction.py this module does
+not import models, so pool workers start cheaply.
+"""
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+
+import fitz  # PyMuPDF
+from django.conf import settings
+from PIL import Image
+
+from .extraction_cache import file_sha256
+from .file_cache import evict_lru
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = getattr(settings, 'PDF_PREVIEW_CACHE_DIR', os.path.join(settings.BASE_DIR, 'cache', 'previews'))
+WORKERS = getattr(settings, 'PDF_PREVIEW_WORKERS', 2)  # 0 renders in the request process
+DPIS = tuple(sorted(getattr(settings, 'PDF_PREVIEW_DPIS', (48, 96, 150))))
+MAX_BYTES = getattr(settings, 'PDF_PREVIEW_CACHE_MAX_BYTES', 256 * 1024 * 1024)
+WEBP_QUALITY = getattr(settings, 'PDF_PREVIEW_WEBP_QUALITY', 80)
+
+CONTENT_TYPES = {'png': 'image/png', 'webp': 'image/webp'}
+
+_executor = None
+_executor_lock = threading.Lock()
+_written_lock = threading.Lock()
+_written_since_evict = 0  # Bytes this process rendered since it last walked the cache
+
+
+def snap_dpi(dpi):
+    """The allowed DPI closest to the requested one (ties go to the lower)."""
+    dpi = int(dpi)
+    return min(DPIS, key=lambda allowed: (abs(allowed - dpi), allowed))
+
+
+def _render_page(file_path, page_index, dpi, image_type):
+    """Pool worker: returns one encoded page, or None if the page doesn't exist."""
+    doc = fitz.open(file_path)
+    try:
+        if not 0 <= page_index < len(doc):
+            return None
+        pixmap = doc.load_page(page_index).get_pixmap(dpi=dpi, alpha=False)
+        if image_type == 'png':
+            return pixmap.tobytes('png')
+        image = Image.frombytes('RGB', (pixmap.width, pixmap.height), pixmap.samples)
+        buffer = BytesIO()
+        image.save(buffer, 'WEBP', quality=WEBP_QUALITY)
+        return buffer.getvalue()
+    finally:
+        doc.close()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(max_workers=WORKERS)
+    return _executor
+
+
+@lru_cache(maxsize=256)
+def _digest_for(file_path, mtime_ns, size):
+    return file_sha256(file_path)
+
+
+def pdf_digest(file_path):
+    """SHA-256 of the file, recomputed only when its mtime or size changes."""
+    file_stat = os.stat(file_path)
+    return _digest_for(file_path, file_stat.st_mtime_ns, file_stat.st_size)
+
+
+def cache_path(digest, page, dpi, image_type):
+    return os.path.join(CACHE_DIR, digest[:2], f"{digest}-p{page}-{dpi}dpi.{image_type}")
+
+
+def render_preview(file_path, digest, page, dpi, image_type):
+    """
+    Returns the path of the cached rendering of `page` (1-based), rendering
+    it first on a miss, or None if the document has no such page.
+    """
+    path = cache_path(digest, page, dpi, image_type)
+    try:
+        os.utime(path)  # Eviction uses the mtime as last access
+        return path
+    except FileNotFoundError:
+        pass
+
+    if WORKERS > 0:
+        data = _get_executor().submit(_render_page, file_path, page - 1, dpi, image_type).result()
+    else:
+        data = _render_page(file_path, page - 1, dpi, image_type)
+    if data is None:
+        return None
+
+    # Write then rename, so concurrent renders of the same page never expose a partial file.
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    logger.info(f"Rendered page {page} of {digest} at {dpi} dpi ({image_type}, {len(data)} bytes)")
+    _maybe_evict(len(data))
+    return path
+
+
+def _maybe_evict(written):
+    # Walking the cache on every render would dominate small renders, so
+    # each process only does it after writing 5% of the budget.
+    global _written_since_evict
+    with _written_lock:
+        _written_since_evict += written
+        if _written_since_evict < MAX_BYTES // 20:
+            return
+        _written_since_evict = 0
+    evict()
+
+
+def evict(max_bytes=None):
+    """Deletes least recently used renderings until the cache fits in max_bytes."""
+    suffixes = tuple(f'.{image_type}' for image_type in CONTENT_TYPES)
+    removed = evict_lru(CACHE_DIR, MAX_BYTES if max_bytes is None else max_bytes, suffixes)
+    if removed:
+        logger.info(f"Evicted {removed} page previews.")
+    return removed
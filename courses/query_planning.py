@@ -0,0 +1,94 @@
+"""
+Derives select_related/prefetch_related lookups from a serializer's fields.
+
+Dotted sources (`professor.get_full_name`), nested serializers and
+string/hyperlinked related fields all dereference relations per row. Walking
+the declared fields once per serializer class tells us which joins and
+prefetches make serialization a fixed number of queries.
+"""
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+
+
+def _relation(model, name):
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    return field if field.is_relation else None
+
+
+def _walk(serializer, model, path, in_prefetch, select, prefetch):
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+
+        many = isinstance(field, (serializers.ListSerializer, ManyRelatedField))
+        if isinstance(field, serializers.ListSerializer):
+            child = field.child
+        elif isinstance(field, ManyRelatedField):
+            child = field.child_relation
+        else:
+            child = field
+
+        # Follow the source attribute chain while it traverses relations.
+        current_model = model
+        lookup = path
+        prefetching = in_prefetch
+        attrs = field.source_attrs
+        for index, attr in enumerate(attrs):
+            relation = _relation(current_model, attr)
+            if relation is None:
+                break
+            is_last = index == len(attrs) - 1
+            # A pk-only related field on the FK itself reads `<fk>_id`, no join needed.
+            if (is_last and isinstance(child, PrimaryKeyRelatedField) and not many
+                    and relation.many_to_one and relation.concrete):
+                break
+            lookup = f"{lookup}__{attr}" if lookup else attr
+            if relation.one_to_many or relation.many_to_many:
+                prefetching = True
+            (prefetch if prefetching else select).add(lookup)
+            current_model = relation.related_model
+        else:
+            if isinstance(child, serializers.BaseSerializer) and attrs:
+                _walk(child, current_model, lookup, prefetching, select, prefetch)
+
+
+@lru_cache(maxsize=None)
+def plan_for(serializer_class):
+    """Returns (select_related, prefetch_related) lookup tuples for serializer_class."""
+    serializer = serializer_class()
+    model = serializer.Meta.model
+    select, prefetch = set(), set()
+    _walk(serializer, model, '', False, select, prefetch)
+    return _deepest(select), _deepest(prefetch)
+
+
+def _deepest(lookups):
+    # A nested lookup implies its parents; keep only the deepest ones.
+    return tuple(sorted(
+        lookup for lookup in lookups if not any(other.startswith(lookup + '__') for other in lookups)
+    ))
+
+
+def optimize_queryset(queryset, serializer_class):
+    """Applies the joins/prefetches serializer_class needs to queryset."""
+    select, prefetch = plan_for(serializer_class)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+class OptimizedQuerysetMixin:
+    """
+    Generic view mixin: applies the serializer's query plan to the view's
+    queryset. Hooks filter_queryset so views overriding get_queryset are covered.
+    """
+    def filter_queryset(self, queryset):
+        return optimize_queryset(super().filter_queryset(queryset), self.get_serializer_class())
@@ -0,0 +1,175 @@
+"""
+In-process cache of quiz data that rarely changes: answer keys for grading
+and rendered QuizSerializer payloads for display.
+
+Values live in each process's memory, keyed by (quiz_id, kind, version).
+The versions themselves live in the shared Django cache (QUIZ_CACHE_ALIAS)
+and are read on every lookup, so saving or deleting a Quiz, Question or
+Choice in one worker (see the receivers in models.py) retires the entries
+of every worker. A value loaded while an edit was in flight is never stored
+under the new version. Entries also expire after QUIZ_CACHE_TTL seconds,
+which bounds staleness when the configured cache is not actually shared
+(e.g. LocMemCache), and the least recently used ones are evicted beyond
+QUIZ_CACHE_MAX_ENTRIES.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from intellectra.metrics import registry
+
+from .grading import load_answer_keys
+from .models import Quiz
+from .query_planning import optimize_queryset
+from .serializers import QuizSerializer
+
+ANSWER_KEY = 'answer_key'
+PAYLOAD = 'payload'
+
+
+class VersionedLRUCache:
+    GENERATION_KEY = 'quiz_cache:generation'  # Bumped by clear()
+
+    def __init__(self, max_entries, ttl, cache_alias='default'):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.cache_alias = cache_alias
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _version_key(self, quiz_id):
+        return f'quiz_cache:version:{quiz_id}'
+
+    def _versions(self, quiz_ids):
+        """
+        Returns {quiz_id: version} from the shared cache in one round trip.
+        Missing counters are created with a fresh unique value, so a counter
+        lost to shared-cache eviction never matches an old local entry. The
+        version is None when the cache does not store anything (DummyCache).
+        """
+        cache = caches[self.cache_alias]
+        keys = {quiz_id: self._version_key(quiz_id) for quiz_id in quiz_ids}
+        stored = cache.get_many([self.GENERATION_KEY, *keys.values()])
+        missing = [key for key in [self.GENERATION_KEY, *keys.values()] if key not in stored]
+        if missing:
+            for key in missing:
+                cache.add(key, time.time_ns(), timeout=None)
+            stored.update(cache.get_many(missing))
+        generation = stored.get(self.GENERATION_KEY)
+        if generation is None:
+            return {quiz_id: None for quiz_id in quiz_ids}
+        return {quiz_id: stored.get(key) and (generation, stored[key]) for quiz_id, key in keys.items()}
+
+    def get_many(self, quiz_ids, kind, loader):
+        """
+        Returns {quiz_id: value} for quiz_ids. Misses are loaded together with
+        loader(missing_ids), which must return a dict keyed by quiz id.
+        """
+        versions = self._versions(quiz_ids)
+        now = time.monotonic()
+        found = {}
+        missing = {}
+        with self._lock:
+            for quiz_id in quiz_ids:
+                key = (quiz_id, kind, versions[quiz_id])
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(key)
+                    found[quiz_id] = entry[1]
+                    self.hits += 1
+                else:
+                    self._entries.pop(key, None)
+                    missing[quiz_id] = versions[quiz_id]
+                    self.misses += 1
+
+        if missing:
+            loaded = loader(list(missing))
+            # Skip values read before a concurrent invalidation.
+            current = self._versions(list(loaded))
+            expires_at = time.monotonic() + self.ttl
+            with self._lock:
+                for quiz_id, value in loaded.items():
+                    if missing[quiz_id] is not None and current[quiz_id] == missing[quiz_id]:
+                        self._entries[(quiz_id, kind, missing[quiz_id])] = (expires_at, value)
+                self._evict()
+            found.update(loaded)
+        return found
+
+    def get(self, quiz_id, kind, loader):
+        return self.get_many([quiz_id], kind, lambda ids: {quiz_id: loader()})[quiz_id]
+
+    def invalidate(self, quiz_id):
+        caches[self.cache_alias].set(self._version_key(quiz_id), time.time_ns(), timeout=None)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == quiz_id]:
+                del self._entries[key]
+            self.invalidations += 1
+
+    def clear(self):
+        caches[self.cache_alias].set(self.GENERATION_KEY, time.time_ns(), timeout=None)
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+quiz_cache = VersionedLRUCache(
+    getattr(settings, 'QUIZ_CACHE_MAX_ENTRIES', 1024),
+    ttl=getattr(settings, 'QUIZ_CACHE_TTL', 300),
+    cache_alias=getattr(settings, 'QUIZ_CACHE_ALIAS', 'default'),
+)
+
+
+def get_answer_key(quiz_id):
+    return quiz_cache.get_many([quiz_id], ANSWER_KEY, load_answer_keys)[quiz_id]
+
+
+def get_answer_keys(quiz_ids):
+    return quiz_cache.get_many(quiz_ids, ANSWER_KEY, load_answer_keys)
+
+
+def get_quiz_payloads(quiz_ids):
+    """Rendered QuizSerializer data for each quiz id, in the given order."""
+    payloads = quiz_cache.get_many(quiz_ids, PAYLOAD, _load_payloads)
+    return [payloads[quiz_id] for quiz_id in quiz_ids if quiz_id in payloads]
+
+
+def _load_payloads(quiz_ids):
+    quizzes = optimize_queryset(Quiz.objects.filter(id__in=quiz_ids), QuizSerializer)
+    return {quiz.id: QuizSerializer(quiz).data for quiz in quizzes}
+
+
+def _collect_metrics():
+    stats = quiz_cache.stats()
+    yield 'quiz_cache_entries', 'gauge', "Entries held in the quiz cache.", stats['entries']
+    yield 'quiz_cache_hits_total', 'counter', "Quiz cache lookups served from memory.", stats['hits']
+    yield 'quiz_cache_misses_total', 'counter', "Quiz cache lookups that hit the database.", stats['misses']
+    yield 'quiz_cache_evictions_total', 'counter', "Entries evicted from the quiz cache.", stats['evictions']
+    yield 'quiz_cache_invalidations_total', 'counter', "Quiz cache invalidations.", stats['invalidations']
+
+
+registry.register_collector(_collect_metrics)
@@ -0,0 +1,79 @@
+"""
+Denormalized course rating aggregates.
+
+Course.review_count, Course.review_sum, Course.rating (the average) and the
+CourseRatingBucket histogram are adjusted with atomic F-expression UPDATEs
+whenever a review is created, edited or deleted (receivers in models.py),
+so nothing aggregates over the Review table at request time. Each update
+bumps the catalog cache version, since course payloads show the rating.
+`manage.py rebuild_rating_aggregates` recomputes everything in bulk.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, FloatField, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+from .models import Course, CourseRatingBucket, Review
+from .response_cache import bump_version
+
+
+def _apply(course_id, note, delta):
+    new_count = F('review_count') + delta
+    new_sum = F('review_sum') + delta * note
+    with transaction.atomic():
+        # All right-hand sides see the pre-update row, so the average is
+        # computed from the new totals in the same statement.
+        Course.objects.filter(pk=course_id).update(
+            review_count=new_count,
+            review_sum=new_sum,
+            rating=Coalesce(Cast(new_sum, FloatField()) / NullIf(new_count, 0), Value(0.0)),
+        )
+        updated = CourseRatingBucket.objects.filter(course_id=course_id, note=note).update(count=F('count') + delta)
+        if not updated and delta > 0:
+            try:
+                with transaction.atomic():
+                    CourseRatingBucket.objects.create(course_id=course_id, note=note, count=delta)
+            except IntegrityError:
+                # Created concurrently by another request.
+                CourseRatingBucket.objects.filter(course_id=course_id, note=note).update(count=F('count') + delta)
+        transaction.on_commit(bump_version)
+
+
+def add_review_note(course_id, note):
+    _apply(course_id, note, 1)
+
+
+def remove_review_note(course_id, note):
+    _apply(course_id, note, -1)
+
+
+def rating_histogram(course_id):
+    """{note: count} for a course, read from the maintained buckets."""
+    return dict(
+        CourseRatingBucket.objects.filter(course_id=course_id, count__gt=0)
+        .order_by('note').values_list('note', 'count')
+    )
+
+
+def rebuild_all(batch_size=500):
+    """Recomputes every course's aggregates and histogram from the Review table."""
+    totals = {
+        row['cours']: row
+        for row in Review.objects.values('cours').annotate(count=Count('id'), total=Sum('note'))
+    }
+    buckets = [
+        CourseRatingBucket(course_id=row['cours'], note=row['note'], count=row['count'])
+        for row in Review.objects.values('cours', 'note').annotate(count=Count('id'))
+    ]
+
+    with transaction.atomic():
+        courses = list(Course.objects.only('id', 'review_count', 'review_sum', 'rating'))
+        for course in courses:
+            row = totals.get(course.id)
+            course.review_count = row['count'] if row else 0
+            course.review_sum = row['total'] if row else 0
+            course.rating = course.review_sum / course.review_count if course.review_count else 0.0
+        Course.objects.bulk_update(courses, ['review_count', 'review_sum', 'rating'], batch_size=batch_size)
+        CourseRatingBucket.objects.all().delete()
+        CourseRatingBucket.objects.bulk_create(buckets, batch_size=batch_size)
+        transaction.on_commit(bump_version)
+    return len(courses)
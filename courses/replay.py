@@ -0,0 +1,233 @@
+"""
+Replays recorded HTTP traffic against a running server, for capacity
+planning of the WSGI/ASGI deployment. Driven by `manage.py replay_traffic`.
+
+Input is JSON lines, one request per line:
+
+    {"method": "GET", "path": "/courses/", "query": {"page": "2"},
+     "headers": {"Authorization": "Bearer ..."}, "body": {...}}
+
+Only method and path are required; query may also be a string, and a
+non-string body is sent as JSON. Lines that are not request objects are
+skipped. Requests are sent over keep-alive HTTP/1.1 connections by a
+plain asyncio client, one connection per concurrent worker, optionally
+paced to a fixed rate. With a rate, latency is measured from each
+request's scheduled start, so time spent queued behind a saturated server
+counts (no coordinated omission).
+"""
+import asyncio
+import json
+import re
+import ssl
+import statistics
+import time
+from collections import Counter, defaultdict
+from urllib.parse import urlencode, urlsplit
+
+from .benchmark import percentile
+
+ID_SEGMENT = re.compile(r"^(\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})$")
+
+
+class ReplayRequest:
+    __slots__ = ('method', 'path', 'query', 'headers', 'body')
+
+    def __init__(self, method, path, query='', headers=None, body=None):
+        self.method = method.upper()
+        self.path = path
+        self.query = query
+        self.headers = headers or {}
+        self.body = body
+
+    @property
+    def endpoint(self):
+        """Method plus path with ids collapsed, e.g. `GET /courses/{id}/`."""
+        segments = ['{id}' if ID_SEGMENT.match(segment) else segment for segment in self.path.split('/')]
+        return f"{self.method} {'/'.join(segments)}"
+
+    @property
+    def target(self):
+        return f"{self.path}?{self.query}" if self.query else self.path
+
+
+def load_requests(lines):
+    """Parses JSON lines into ReplayRequests, skipping anything else. Returns (requests, skipped)."""
+    requests = []
+    skipped = 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            skipped += 1
+            continue
+        if not isinstance(record, dict) or not isinstance(record.get('method'), str) \
+                or not isinstance(record.get('path'), str) or not record['path'].startswith('/'):
+            skipped += 1
+            continue
+        query = record.get('query') or ''
+        if isinstance(query, dict):
+            query = urlencode(query, doseq=True)
+        headers = {str(name): str(value) for name, value in (record.get('headers') or {}).items()}
+        body = record.get('body')
+        if body is not None and not isinstance(body, str):
+            body = json.dumps(body)
+            headers.setdefault('Content-Type', 'application/json')
+        requests.append(ReplayRequest(record['method'], record['path'], str(query), headers, body))
+    return requests, skipped
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection, reopened after errors or `Connection: close`."""
+
+    def __init__(self, host, port, use_ssl, default_headers):
+        self.host = host
+        self.port = port
+        self.ssl = ssl.create_default_context() if use_ssl else None
+        self.default_headers = default_headers
+        self.reader = self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+    async def send(self, request):
+        """Sends request and reads the whole response. Returns (status, body_bytes)."""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+        body = request.body.encode('utf-8') if request.body is not None else b''
+        headers = {'Host': f"{self.host}:{self.port}", 'Connection': 'keep-alive', **self.default_headers,
+                   **request.headers, 'Content-Length': str(len(body))}
+        head = f"{request.method} {request.target} HTTP/1.1\r\n" + "".join(
+            f"{name}: {value}\r\n" for name, value in headers.items()
+        ) + "\r\n"
+        self.writer.write(head.encode('latin-1') + body)
+        await self.writer.drain()
+
+        status, size, keep_alive = await self._read_response(request.method)
+        if not keep_alive:
+            await self.close()
+        return status, size
+
+    async def _read_response(self, method):
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Server closed the connection.")
+        status = int(status_line.split(b' ', 2)[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive = headers.get('connection', '').lower() != 'close'
+        size = 0
+        if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+            pass
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            while True:
+                chunk_size = int((await self.reader.readline()).split(b';')[0].strip(), 16)
+                if chunk_size == 0:
+                    while (await self.reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass  # Trailers
+                    break
+                await self.reader.readexactly(chunk_size + 2)
+                size += chunk_size
+        elif 'content-length' in headers:
+            size = int(headers['content-length'])
+            await self.reader.readexactly(size)
+        else:
+            size = len(await self.reader.read())  # Body delimited by connection close
+            keep_alive = False
+        return status, size, keep_alive
+
+
+async def replay(requests, base_url, concurrency=10, rate=None, timeout=30.0, headers=None):
+    """
+    Sends every request and returns (results, wall_seconds), with one
+    (endpoint, status or None, latency_seconds, error_name or None) per request.
+    """
+    url = urlsplit(base_url)
+    use_ssl = url.scheme == 'https'
+    host = url.hostname or '127.0.0.1'
+    port = url.port or (443 if use_ssl else 80)
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    results = []
+
+    async def produce():
+        started = loop.time()
+        for index, request in enumerate(requests):
+            scheduled = None
+            if rate:
+                scheduled = started + index / rate
+                delay = scheduled - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await queue.put((request, scheduled))
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def work():
+        connection = Connection(host, port, use_ssl, headers or {})
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            request, scheduled = item
+            started = scheduled if scheduled is not None else loop.time()
+            status = error = None
+            try:
+                status, _ = await asyncio.wait_for(connection.send(request), timeout)
+            except (OSError, ValueError, IndexError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                error = type(e).__name__
+                await connection.close()
+            results.append((request.endpoint, status, loop.time() - started, error))
+        await connection.close()
+
+    wall_started = time.perf_counter()
+    await asyncio.gather(produce(), *(work() for _ in range(concurrency)))
+    return results, time.perf_counter() - wall_started
+
+
+def _summary(rows, wall_seconds=None):
+    latencies = sorted(latency for _, _, latency, _ in rows)
+    statuses = Counter(str(status) if status is not None else error for _, status, _, error in rows)
+    errors = sum(1 for _, status, _, error in rows if error is not None or status >= 500)
+    non_2xx = sum(1 for _, status, _, error in rows if error is not None or not 200 <= status < 300)
+    summary = {
+        'requests': len(rows),
+        'error_rate': round(errors / len(rows), 4),
+        'non_2xx_rate': round(non_2xx / len(rows), 4),
+        'status_codes': dict(statuses),
+        'latency_ms': {
+            'mean': round(statistics.fmean(latencies) * 1000, 3),
+            'p50': round(percentile(latencies, 0.50) * 1000, 3),
+            'p95': round(percentile(latencies, 0.95) * 1000, 3),
+            'p99': round(percentile(latencies, 0.99) * 1000, 3),
+            'max': round(latencies[-1] * 1000, 3),
+        },
+    }
+    if wall_seconds:
+        summary['throughput_rps'] = round(len(rows) / wall_seconds, 2)
+    return summary
+
+
+def summarize(results, wall_seconds):
+    """Overall and per-endpoint latency percentiles, error rates and status counts."""
+    by_endpoint = defaultdict(list)
+    for row in results:
+        by_endpoint[row[0]].append(row)
+    return {
+        'overall': _summary(results, wall_seconds) if results else None,
+        'endpoints': {endpoint: _summary(rows) for endpoint, rows in sorted(by_endpoint.items())},
+    }
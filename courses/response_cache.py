@@ -0,0 +1,146 @@
+"""
+Server-side response cache for the read-heavy catalog endpoints.
+
+Serialized response data is cached per absolute URL (host, path and sorted
+query parameters) under a global catalog version. Any save or delete of a
+Course, Category or CoursePdfInternal bumps the version (receivers in
+models.py), as do section writes (persistence.py) and review rating
+updates (ratings.py), which orphans every cached entry at once.
+The version lives in CATALOG_CACHE_VERSION_ALIAS, a cache shared by all
+processes, so bumps made by the ingestion workers reach the web workers.
+
+Entries are fresh for CATALOG_CACHE_TTL seconds. After that they are
+still served for up to CATALOG_CACHE_STALE_TTL seconds while a single
+background thread recomputes them (stale-while-revalidate) from a copy
+of the request.
+"""
+import hashlib
+import logging
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.http import HttpRequest
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+CACHE_ALIAS = getattr(settings, 'CATALOG_CACHE_ALIAS', 'catalog')
+VERSION_CACHE_ALIAS = getattr(settings, 'CATALOG_CACHE_VERSION_ALIAS', CACHE_ALIAS)
+FRESH_SECONDS = getattr(settings, 'CATALOG_CACHE_TTL', 60)
+STALE_SECONDS = getattr(settings, 'CATALOG_CACHE_STALE_TTL', 600)
+VERSION_KEY = 'catalog:version'
+REVALIDATE_LOCK_SECONDS = 30
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def get_version_cache():
+    return caches[VERSION_CACHE_ALIAS]
+
+
+def current_version():
+    cache = get_version_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Start from the clock so a lost version key never revives old entries.
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    cache = get_version_cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def cache_key(request):
+    params = sorted((key, value) for key, values in request.GET.lists() for value in values)
+    raw = f"{request.scheme}://{request.get_host()}{request.path}?{params}"
+    return f"catalog:{current_version()}:{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
+
+
+def _store(key, response):
+    if response.status_code == 200 and hasattr(response, 'data'):
+        get_cache().set(key, (response.data, time.time()), timeout=FRESH_SECONDS + STALE_SECONDS)
+
+
+def _copy_request(request):
+    """
+    A new GET request with the same URL and headers, detached from the
+    original, which is finished (and possibly reused) once its response is
+    sent. It is flagged so cached_response recomputes instead of serving.
+    """
+    original = getattr(request, '_request', request)
+    copy = HttpRequest()
+    copy.method = 'GET'
+    copy.path = original.path
+    copy.path_info = original.path_info
+    copy.META = dict(original.META)
+    copy.GET = original.GET.copy()
+    copy.resolver_match = original.resolver_match
+    copy.revalidating_cache = True
+    return copy
+
+
+def _revalidate(key, request):
+    cache = get_cache()
+    lock_key = f"{key}:revalidating"
+    if not cache.add(lock_key, 1, timeout=REVALIDATE_LOCK_SECONDS):
+        return  # Another request is already refreshing this entry
+    copy = _copy_request(request)
+    match = copy.resolver_match
+
+    def refresh():
+        # Dispatches through the URL's view again, so class-based views get
+        # a fresh instance bound to the copy.
+        try:
+            match.func(copy, *match.args, **match.kwargs)
+        except Exception:
+            logger.exception(f"Background revalidation of {copy.path} failed")
+        finally:
+            cache.delete(lock_key)
+            connection.close()  # Threads get their own connection
+
+    threading.Thread(target=refresh, daemon=True).start()
+
+
+def cached_response(view):
+    """
+    Caches the data of successful GET responses of a DRF view. Apply below
+    @api_view (or through method_decorator on a class-based view's get).
+    Sets X-Cache to HIT, STALE or MISS.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            return view(request, *args, **kwargs)
+
+        key = cache_key(request)
+        entry = None if getattr(request, 'revalidating_cache', False) else get_cache().get(key)
+        if entry is not None:
+            data, stored_at = entry
+            age = time.time() - stored_at
+            response = Response(data)
+            response['Age'] = str(int(age))
+            if age > FRESH_SECONDS:
+                _revalidate(key, request)
+                response['X-Cache'] = 'STALE'
+            else:
+                response['X-Cache'] = 'HIT'
+            return response
+
+        response = view(request, *args, **kwargs)
+        _store(key, response)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    return wrapper
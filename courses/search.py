@@ -0,0 +1,184 @@
+"""
+Full-text search over extracted course sections.
+
+The index is kept up to date incrementally by courses/persistence.py as
+sections are written, and cleared when a course's PDF data is deleted.
+The backend is pluggable through COURSE_SEARCH_BACKEND (a dotted path);
+by default SQLite databases use an FTS5 virtual table and other databases
+fall back to plain ORM `icontains` matching.
+"""
+import html
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.utils.module_loading import import_string
+
+from .models import CourseSection
+
+FTS_TABLE = 'courses_section_fts'
+SNIPPET_TOKENS = 12
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+# Placeholders around matches; PDF text is escaped before they become <mark> tags.
+MARK_START, MARK_END = '\x02', '\x03'
+
+
+def query_terms(query):
+    return TOKEN_PATTERN.findall(query or '')
+
+
+def render_snippet(text):
+    """HTML-escapes extracted text and turns the match placeholders into <mark> tags."""
+    return html.escape(text).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+
+
+class SearchBackend:
+    """Interface for section search backends."""
+
+    def index_sections(self, pdf_data, sections):
+        """Adds or replaces the index entries of saved CourseSection objects."""
+
+    def remove_sections(self, section_ids):
+        """Drops index entries for the given section ids."""
+
+    def remove_document(self, pdf_data_id):
+        """
+        Drops every index entry belonging to a CoursePdfInternal. Called
+        before its sections are deleted.
+        """
+
+    def rebuild(self):
+        """Re-indexes every section from the database."""
+
+    def search(self, query, limit=20):
+        """
+        Returns up to `limit` hits, best first, as dicts with section_id,
+        course_id, course_title, title, order, snippet and score.
+        """
+        raise NotImplementedError
+
+
+class DatabaseSearchBackend(SearchBackend):
+    """
+    Portable fallback: case-insensitive substring match on title/content, no
+    index. Sections are ranked by how many terms their title contains.
+    """
+
+    def search(self, query, limit=20):
+        terms = query_terms(query)
+        if not terms:
+            return []
+        condition = Q()
+        score = Value(0)
+        for term in terms:
+            condition &= Q(title__icontains=term) | Q(content__icontains=term)
+            score += Case(When(title__icontains=term, then=Value(1)), default=Value(0), output_field=IntegerField())
+        sections = (
+            CourseSection.objects.filter(condition)
+            .annotate(score=score)
+            .select_related('pdf_data__course')
+            .order_by('-score', 'pdf_data_id', 'order')[:limit]
+        )
+        return [
+            {
+                'section_id': section.id,
+                'course_id': section.pdf_data.course_id,
+                'course_title': section.pdf_data.course.title,
+                'title': section.title,
+                'order': section.order,
+                'snippet': self._snippet(section.content, terms),
+                'score': float(section.score),
+            }
+            for section in sections
+        ]
+
+    def _snippet(self, content, terms, radius=60):
+        lowered = content.lower()
+        positions = [lowered.find(term.lower()) for term in terms]
+        positions = [position for position in positions if position >= 0]
+        start = max(0, min(positions) - radius) if positions else 0
+        excerpt = content[start:start + 2 * radius].strip()
+        pattern = re.compile("|".join(re.escape(term) for term in terms), re.IGNORECASE)
+        return render_snippet(pattern.sub(lambda match: f"{MARK_START}{match.group(0)}{MARK_END}", excerpt))
+
+
+class SqliteFTS5Backend(SearchBackend):
+    """
+    SQLite FTS5 index (table created by migration 0009). Rows are keyed by
+    the section id, and every delete goes through the rowid since the other
+    columns are UNINDEXED; ranking uses bm25 with titles weighted above content.
+    """
+
+    def index_sections(self, pdf_data, sections):
+        rows = [(section.id, section.title, section.content, pdf_data.course_id, pdf_data.id) for section in sections]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            # FTS5 has no upsert; replace by deleting first.
+            cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(row[0],) for row in rows])
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, content, course_id, pdf_data_id) VALUES (%s, %s, %s, %s, %s)",
+                rows,
+            )
+
+    def remove_sections(self, section_ids):
+        if section_ids:
+            with connection.cursor() as cursor:
+                cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(pk,) for pk in section_ids])
+
+    def remove_document(self, pdf_data_id):
+        section_ids = list(CourseSection.objects.filter(pdf_data_id=pdf_data_id).values_list('id', flat=True))
+        self.remove_sections(section_ids)
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, content, course_id, pdf_data_id) "
+                "SELECT s.id, s.title, s.content, p.course_id, p.id "
+                "FROM courses_coursesection s JOIN courses_coursepdfinternal p ON p.id = s.pdf_data_id"
+            )
+
+    def search(self, query, limit=20):
+        terms = query_terms(query)
+        if not terms:
+            return []
+        # Quote every term so user input can't inject FTS syntax; the last
+        # one is a prefix so partially typed words still match.
+        match = " ".join(f'"{term}"' for term in terms) + "*"
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT f.rowid, f.course_id, c.title, f.title, "
+                f"snippet({FTS_TABLE}, 1, %s, %s, '…', {SNIPPET_TOKENS}), "
+                f"bm25({FTS_TABLE}, 5.0, 1.0), s.\"order\" "
+                f"FROM {FTS_TABLE} f "
+                f"JOIN courses_course c ON c.id = f.course_id "
+                f"JOIN courses_coursesection s ON s.id = f.rowid "
+                f"WHERE {FTS_TABLE} MATCH %s ORDER BY bm25({FTS_TABLE}, 5.0, 1.0) LIMIT %s",
+                [MARK_START, MARK_END, match, limit],
+            )
+            rows = cursor.fetchall()
+        return [
+            {
+                'section_id': section_id,
+                'course_id': course_id,
+                'course_title': course_title,
+                'title': title,
+                'order': order,
+                'snippet': render_snippet(snippet),
+                'score': -rank,  # bm25 is lower-is-better
+            }
+            for section_id, course_id, course_title, title, snippet, rank, order in rows
+        ]
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    path = getattr(settings, 'COURSE_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    if connection.vendor == 'sqlite':
+        return SqliteFTS5Backend()
+    return DatabaseSearchBackend()
@@ -1,13 +1,16 @@
 from rest_framework import serializers
-from .models import Course, Category, CourseSection, CoursePdfInternal, Quiz, Question, Choice, QuizResult, Review, EnrolledCourse
+from django.conf import settings
+from intellectra.imaging import SrcsetField
+from intellectra.metrics import TimedSerializerMixin
+from .models import Course, Category, CourseSection, CoursePdfInternal, Quiz, Question, Choice, QuizResult, Review, EnrolledCourse, PdfIngestionJob, ChunkedUpload
 
-class ChoiceSerializer(serializers.ModelSerializer):
+class ChoiceSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Choice
         fields = ['id', 'text', 'is_correct']
 
 
-class QuestionSerializer(serializers.ModelSerializer):
+class QuestionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     choices = ChoiceSerializer(many=True, read_only=True)
 
     class Meta:
@@ -15,7 +18,7 @@ class QuestionSerializer(serializers.ModelSerializer):
         fields = ['id', 'text', 'choices']
 
 
-class QuizSerializer(serializers.ModelSerializer):
+class QuizSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     questions = QuestionSerializer(many=True, read_only=True)
 
     class Meta:
@@ -23,12 +26,12 @@ class QuizSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'course', 'questions']
 
 
-class CourseSectionSerializer(serializers.ModelSerializer):
+class CourseSectionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = CourseSection
         fields = ['id', 'title', 'content', 'order']  # Adjust fields as necessary
 
-class CoursePdfInternalSerializer(serializers.ModelSerializer):
+class CoursePdfInternalSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     sections = CourseSectionSerializer(many=True, read_only=True)
 
     class Meta:
@@ -36,17 +39,20 @@ class CoursePdfInternalSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'table_of_contents', 'sections']
         read_only_fields = ['name', 'table_of_contents', 'sections']
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    categoryImage_srcset = SrcsetField(source='categoryImage')
+
     class Meta:
         model = Category
         fields = '__all__'
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     professor = serializers.CharField(source='professor.get_full_name', read_only=True)
     category = serializers.CharField(source='category.categoryName', read_only=True)
     pdf_internal_data = CoursePdfInternalSerializer(read_only=True)
     # file = serializers.SerializerMethodField()
     image = serializers.SerializerMethodField()
+    image_srcset = SrcsetField(source='image')
     
 
     # def get_file(self, obj):
@@ -68,9 +74,47 @@ class CourseSerializer(serializers.ModelSerializer):
     class Meta:
         model = Course
         fields = '__all__'
-        read_only_fields = ['id', 'created_at', 'professor']
+        read_only_fields = ['id', 'created_at', 'professor', 'rating', 'review_count', 'review_sum']
+
+class FieldsProjectionMixin:
+    """
+    Lets clients request a subset of fields with `?fields=id,title,...`.
+    Unknown names are ignored; without the parameter all fields are returned.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request', None)
+        if request is None:
+            return
+        requested = getattr(request, 'query_params', request.GET).get('fields')
+        if requested:
+            allowed = {name.strip() for name in requested.split(',') if name.strip()}
+            for name in set(self.fields) - allowed:
+                self.fields.pop(name)
+
+
+class CourseSummarySerializer(TimedSerializerMixin, FieldsProjectionMixin, serializers.ModelSerializer):
+    """Catalog view of a course: no PDF sections, only what list pages display."""
+    professor = serializers.CharField(source='professor.get_full_name', read_only=True)
+    category = serializers.CharField(source='category.categoryName', read_only=True)
+    image = serializers.SerializerMethodField()
+    image_srcset = SrcsetField(source='image')
+
+    def get_image(self, obj):
+        if obj.image:
+            request = self.context.get('request', None)
+            if request is not None:
+                return request.build_absolute_uri(obj.image.url)
+            return f"{settings.MEDIA_URL}{obj.image}"
+        return None
+
+    class Meta:
+        model = Course
+        fields = ['id', 'title', 'description', 'image', 'image_srcset', 'file_type', 'duration', 'rating',
+                  'review_count', 'created_at', 'professor', 'category']
+        read_only_fields = fields
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     etudiant = serializers.StringRelatedField(read_only=True)  # affichera le nom de l'étudiant
 
     class Meta:
@@ -78,10 +122,25 @@ class ReviewSerializer(serializers.ModelSerializer):
         fields = ['id', 'cours', 'etudiant', 'note', 'commentaire', 'date_creation']
         read_only_fields = ['id', 'etudiant', 'date_creation']
 
-class EnrolledCourseSerializer(serializers.ModelSerializer):
+class EnrolledCourseSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     etudiant = serializers.StringRelatedField(read_only=True)  # afficher nom utilisateur
 
     class Meta:
         model = EnrolledCourse
         fields = ['id', 'cours', 'etudiant', 'date_inscription']
         read_only_fields = ['id', 'etudiant', 'date_inscription']
+
+class PdfIngestionJobSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    progress = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = PdfIngestionJob
+        fields = ['id', 'course', 'pdf_name', 'status', 'progress', 'pages_done', 'pages_total',
+                  'attempts', 'max_attempts', 'error', 'created_at', 'started_at', 'finished_at']
+        read_only_fields = fields
+
+class ChunkedUploadSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = ChunkedUpload
+        fields = ['id', 'kind', 'filename', 'size', 'offset', 'status', 'course', 'error', 'created_at', 'updated_at']
+        read_only_fields = fields
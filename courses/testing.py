@@ -0,0 +1,89 @@
+"""
+Test helpers.
+
+QueryScalingMixin catches N+1 query regressions. Usage in a TestCase:
+
+    class CourseListTests(QueryScalingMixin, TestCase):
+        def test_list_is_constant(self):
+            self.assertQueriesConstant(make_courses, lambda: self.client.get('/courses/'))
+
+TemporaryFilesMixin and pdf_bytes are for tests that store course files.
+"""
+import os
+import tempfile
+from unittest import mock
+
+import fitz  # PyMuPDF
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from . import extraction_cache, previews
+
+
+def count_queries(action):
+    with CaptureQueriesContext(connection) as context:
+        action()
+    return len(context.captured_queries), context.captured_queries
+
+
+class QueryScalingMixin:
+    """
+    TestCase mixin asserting that the number of queries an action issues
+    does not grow with the number of rows it reads.
+    """
+
+    def assertQueriesConstant(self, make_rows, action, sizes=(1, 5, 20)):
+        """
+        For each size, calls make_rows(size) so that `size` rows exist, then
+        counts the queries action() issues. Fails if the counts differ.
+        """
+        counts = []
+        for size in sizes:
+            make_rows(size)
+            count, queries = count_queries(action)
+            counts.append((size, count, queries))
+
+        if len({count for _, count, _ in counts}) > 1:
+            size, count, queries = counts[-1]
+            details = "\n".join(query['sql'] for query in queries)
+            summary = ", ".join(f"{size} rows: {count}" for size, count, _ in counts)
+            self.fail(f"Query count grows with row count ({summary}). Queries for {size} rows:\n{details}")
+
+
+class TemporaryFilesMixin:
+    """
+    TestCase mixin pointing MEDIA_ROOT, UPLOAD_TEMP_DIR and the extraction
+    and preview caches at a temporary directory removed after each test.
+    """
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.media_root = os.path.join(directory.name, 'media')
+        overrides = override_settings(MEDIA_ROOT=self.media_root, UPLOAD_TEMP_DIR=os.path.join(directory.name, 'uploads'))
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        # Read once at import, so patched rather than overridden.
+        for module, name in ((extraction_cache, 'extraction'), (previews, 'previews')):
+            patcher = mock.patch.object(module, 'CACHE_DIR', os.path.join(directory.name, 'cache', name))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+def pdf_bytes(pages=3, sections_per_page=2, label="Body"):
+    """A PDF whose pages hold numbered headings ("1. Heading 1"), each followed by a line of text."""
+    doc = fitz.open()
+    number = 0
+    for _ in range(pages):
+        page = doc.new_page()
+        y = 72
+        for _ in range(sections_per_page):
+            number += 1
+            page.insert_text((72, y), f"{number}. Heading {number}", fontsize=12)
+            page.insert_text((72, y + 20), f"{label} text of section {number}.", fontsize=10)
+            y += 60
+    data = doc.tobytes()
+    doc.close()
+    return data
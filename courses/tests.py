@@ -1,3 +1,600 @@
-from django.test import TestCase
+import hashlib
+import os
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.db import OperationalError, connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .extraction import ExtractionStats, extract_sections, stream_sections
+from .ingestion import claim_next_job, ingest_course_pdf, requeue_stale_jobs, run_job
+from .models import (
+    Category, ChunkedUpload, Choice, Course, CoursePdfInternal, EnrolledCourse, PdfIngestionJob, Question, Quiz,
+    PdfExtractionStats, QuizResult, Review,
+)
+from .persistence import save_sections
+from . import previews, response_cache
+from .response_cache import bump_version
+from .search import FTS_TABLE
+from .testing import QueryScalingMixin, TemporaryFilesMixin, pdf_bytes
+from .uploads import claim_next_upload, verify_upload
+
+User = get_user_model()
+
+# Response caching would hide the queries the views issue.
+NO_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    'catalog': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    'shared': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+# Process-local caches, so tests never touch the file-based ones.
+LOCAL_CACHES = {
+    alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'tests-{alias}'}
+    for alias in NO_CACHE
+}
+
+
+@override_settings(CACHES=NO_CACHE)
+class CourseQueryCountTests(QueryScalingMixin, TestCase):
+    """The read endpoints must issue the same number of queries for 1 or 20 rows."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.category = Category.objects.create(categoryName="Informatique", description="x")
+        self.professor = User.objects.create_user('prof', 'prof@example.com', 'pass', role='prof')
+        self.student = User.objects.create_user('etudiant', 'etudiant@example.com', 'pass', role='etudiant')
+
+    def make_course(self, index):
+        return Course.objects.create(
+            title=f"Cours {index}", description="x", file_type='video',
+            professor=self.professor, category=self.category,
+        )
+
+    def make_courses(self, size):
+        for index in range(Course.objects.count(), size):
+            self.make_course(index)
+
+    def test_course_list(self):
+        self.assertQueriesConstant(self.make_courses, lambda: self.client.get('/courses/'))
+
+    def test_catalog(self):
+        self.assertQueriesConstant(self.make_courses, lambda: self.client.get('/courses/api/catalog/'))
+
+    def test_catalog_with_ordering(self):
+        self.assertQueriesConstant(
+            self.make_courses, lambda: self.client.get('/courses/api/catalog/?ordering=-rating')
+        )
+
+    def test_reviews(self):
+        course = self.make_course(0)
+
+        def make_reviews(size):
+            for index in range(course.reviews.count(), size):
+                author = User.objects.create_user(f'reviewer{index}', f'reviewer{index}@example.com', 'pass')
+                Review.objects.create(cours=course, etudiant=author, note=4, commentaire="Bien")
+
+        self.assertQueriesConstant(make_reviews, lambda: self.client.get(f'/courses/api/reviews/{course.pk}/'))
+
+    def test_dashboard(self):
+        self.client.force_authenticate(self.student)
+
+        def make_enrollments(size):
+            for index in range(EnrolledCourse.objects.filter(etudiant=self.student).count(), size):
+                course = self.make_course(index)
+                EnrolledCourse.objects.create(cours=course, etudiant=self.student)
+                quiz = Quiz.objects.create(course=course, title=f"Quiz {index}")
+                QuizResult.objects.create(student=self.student, quiz=quiz, score=50.0)
+
+        self.assertQueriesConstant(make_enrollments, lambda: self.client.get('/courses/api/dashboard/'))
+
+
+class QuizGradingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        category = Category.objects.create(categoryName="Informatique", description="x")
+        self.professor = User.objects.create_user('prof', 'prof@example.com', 'pass', role='prof')
+        self.student = User.objects.create_user('etudiant', 'etudiant@example.com', 'pass', role='etudiant')
+        course = Course.objects.create(
+            title="Cours", description="x", file_type='video', professor=self.professor, category=category,
+        )
+        self.quiz = Quiz.objects.create(course=course, title="Quiz")
+        self.question = Question.objects.create(quiz=self.quiz, text="2 + 2 ?")
+        self.right = Choice.objects.create(question=self.question, text="4", is_correct=True)
+        self.wrong = Choice.objects.create(question=self.question, text="5")
+        Question.objects.create(quiz=self.quiz, text="Unanswered")
+
+    def answer(self, choice):
+        return {'question_id': self.question.id, 'selected_choice_id': choice.id}
+
+    def test_duplicate_answers_are_rejected(self):
+        self.client.force_authenticate(self.student)
+        response = self.client.post('/courses/api/submit-quiz/', {
+            'quiz_id': self.quiz.id, 'answers': [self.answer(self.wrong), self.answer(self.right)],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(QuizResult.objects.exists())
+
+    def test_bulk_grading_requires_course_ownership(self):
+        other = User.objects.create_user('autre', 'autre@example.com', 'pass', role='prof')
+        submission = {'student_id': self.student.id, 'quiz_id': self.quiz.id, 'answers': [self.answer(self.right)]}
+
+        self.client.force_authenticate(other)
+        response = self.client.post('/courses/api/submit-quiz/bulk/', {'submissions': [submission]}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(QuizResult.objects.exists())
+
+        self.client.force_authenticate(self.professor)
+        response = self.client.post('/courses/api/submit-quiz/bulk/', {'submissions': [submission]}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['results'][0]['score'], 50.0)
+
+
+class RatingAggregateTests(TestCase):
+    def test_course_save_keeps_concurrent_review_aggregates(self):
+        category = Category.objects.create(categoryName="Informatique", description="x")
+        professor = User.objects.create_user('prof', 'prof@example.com', 'pass', role='prof')
+        student = User.objects.create_user('etudiant', 'etudiant@example.com', 'pass', role='etudiant')
+        course = Course.objects.create(
+            title="Cours", description="x", file_type='video', professor=professor, category=category,
+        )
+        stale = Course.objects.get(pk=course.pk)
+        Review.objects.create(cours=course, etudiant=student, note=4, commentaire="Bien")
+
+        stale.title = "Cours renommé"
+        stale.save()
+
+        course.refresh_from_db()
+        self.assertEqual((course.title, course.review_count, course.review_sum, course.rating), ("Cours renommé", 1, 4, 4.0))
+
+    def test_review_bumps_the_catalog_version_once(self):
+        category = Category.objects.create(categoryName="Informatique", description="x")
+        professor = User.objects.create_user('prof', 'prof@example.com', 'pass', role='prof')
+        student = User.objects.create_user('etudiant', 'etudiant@example.com', 'pass', role='etudiant')
+        course = Course.objects.create(
+            title="Cours", description="x", file_type='video', professor=professor, category=category,
+        )
+        with self.captureOnCommitCallbacks() as callbacks:
+            Review.objects.create(cours=course, etudiant=student, note=4, commentaire="Bien")
+        self.assertEqual(callbacks.count(bump_version), 1)
+
+
+class BulkEnrollTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        category = Category.objects.create(categoryName="Informatique", description="x")
+        self.professor = User.objects.create_user('prof', 'prof@example.com', 'pass', role='prof')
+        self.course = Course.objects.create(
+            title="Cours", description="x", file_type='video', professor=self.professor, category=category,
+        )
+        self.students = [
+            User.objects.create_user(f'etudiant{index}', f'etudiant{index}@example.com', 'pass') for index in range(3)
+        ]
+        self.client.force_authenticate(self.professor)
+
+    def enroll(self, cours, etudiants):
+        return self.client.post('/courses/api/enroll/bulk/', {'cours': cours, 'etudiants': etudiants}, format='json')
+
+    def test_rejects_malformed_payloads(self):
+        self.assertEqual(self.enroll('abc', [self.students[0].id]).status_code, 400)
+        self.assertEqual(self.enroll(self.course.id, str(self.students[0].id)).status_code, 400)
+        self.assertEqual(self.enroll(self.course.id, [str(self.students[0].id)]).status_code, 400)
+        self.assertFalse(EnrolledCourse.objects.exists())
+
+    def test_counts_new_and_existing_enrollments(self):
+        EnrolledCourse.objects.create(cours=self.course, etudiant=self.students[0])
+        response = self.enroll(self.course.id, [student.id for student in self.students] + [999999])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            (response.json()['enrolled'], response.json()['already_enrolled'], response.json()['unknown_students']),
+            (2, 1, [999999]),
+        )
+        self.assertEqual(EnrolledCourse.objects.filter(cours=self.course).count(), 3)
+
+
+class ChunkedUploadTests(TemporaryFilesMixin, TestCase):
+    data = b"video bytes" * 1000
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.category = Category.objects.create(categoryName="Informatique", description="x")
+        self.professor = User.objects.create_user('prof', 'prof@example.com', 'pass', role='prof')
+        self.client.force_authenticate(self.professor)
+
+    def upload(self, sha256):
+        response = self.client.post('/courses/api/uploads/', {
+            'filename': 'cours.mp4', 'size': len(self.data), 'kind': 'videos', 'sha256': sha256,
+        }, format='json')
+        upload = ChunkedUpload.objects.get(pk=response.json()['id'])
+        self.assertFalse(upload.temp_path.startswith(self.media_root))
+        self.client.put(
+            f'/courses/api/uploads/{upload.pk}/', self.data,
+            content_type='application/octet-stream', HTTP_UPLOAD_OFFSET='0',
+        )
+        return self.client.post(f'/courses/api/uploads/{upload.pk}/complete/', {
+            'title': "Cours", 'description': "x", 'category': self.category.pk,
+        }, format='json')
+
+    def test_checksum_is_verified_by_the_workers(self):
+        response = self.upload(hashlib.sha256(self.data).hexdigest())
+        self.assertEqual((response.status_code, response.json()['status']), (202, 'verifying'))
+        self.assertFalse(Course.objects.exists())
+
+        verify_upload(claim_next_upload())
+
+        upload = ChunkedUpload.objects.get()
+        self.assertEqual(upload.status, 'completed')
+        self.assertEqual((upload.course.title, upload.course.category, upload.course.professor),
+                         ("Cours", self.category, self.professor))
+        with upload.course.videos.open('rb') as f:
+            self.assertEqual(f.read(), self.data)
+
+    def test_checksum_mismatch_fails_the_upload(self):
+        self.upload('0' * 64)
+        verify_upload(claim_next_upload())
+
+        upload = ChunkedUpload.objects.get()
+        self.assertEqual(upload.status, 'failed')
+        self.assertIn("Checksum mismatch", upload.error)
+        self.assertFalse(os.path.exists(upload.temp_path))
+        self.assertFalse(Course.objects.exists())
+
+    def test_transient_errors_leave_the_upload_for_retry(self):
+        self.upload(hashlib.sha256(self.data).hexdigest())
+        with mock.patch.object(Course.objects, 'create', side_effect=OperationalError("database is locked")):
+            verify_upload(claim_next_upload())
+
+        upload = ChunkedUpload.objects.get()
+        self.assertEqual((upload.status, upload.error), ('processing', "database is locked"))
+        self.assertTrue(os.path.exists(upload.temp_path))
+
+        ChunkedUpload.objects.update(updated_at=timezone.now() - timedelta(days=1))
+        requeue_stale_jobs()
+        verify_upload(claim_next_upload())
+        self.assertEqual(ChunkedUpload.objects.get().status, 'completed')
+
+    def test_without_checksum_the_course_is_created_at_once(self):
+        response = self.upload('')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Course.objects.get().videos.size, len(self.data))
+
+
+@override_settings(CACHES=NO_CACHE)
+class AsyncViewTests(TestCase):
+    def test_invalid_review_cursor_matches_the_sync_endpoint(self):
+        category = Category.objects.create(categoryName="Informatique", description="x")
+        professor = User.objects.create_user('prof', 'prof@example.com', 'pass', role='prof')
+        course = Course.objects.create(
+            title="Cours", description="x", file_type='video', professor=professor, category=category,
+        )
+        sync = self.client.get(f'/courses/api/reviews/{course.pk}/?cursor=invalide')
+        response = self.client.get(f'/courses/api/async/reviews/{course.pk}/?cursor=invalide')
+        self.assertEqual((response.status_code, response.json()), (sync.status_code, sync.json()))
+        self.assertEqual(response.status_code, 404)
+
+
+class SectionPersistenceTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(categoryName="Informatique", description="x")
+        professor = User.objects.create_user('prof', 'prof@example.com', 'pass', role='prof')
+        course = Course.objects.create(
+            title="Cours", description="x", file_type='video', professor=professor, category=category,
+        )
+        self.pdf_data = CoursePdfInternal.objects.create(course=course, name='cours.pdf')
+
+    def sections(self, label, count=4):
+        return [{'title': f"{order}. {label}", 'content': label, 'order': order} for order in range(count)]
+
+    def stored(self):
+        return list(self.pdf_data.sections.order_by('order', 'id').values_list('order', 'title'))
+
+    def test_failed_extraction_leaves_the_previous_rows(self):
+        save_sections(self.pdf_data, self.sections('old'))
+
+        def failing():
+            yield from self.sections('new')[:3]
+            raise RuntimeError("extraction failed")
+
+        with self.assertRaises(RuntimeError):
+            save_sections(self.pdf_data, failing(), batch_size=1)
+        self.assertEqual(self.stored(), [(order, f"{order}. old") for order in range(4)])
+
+        save_sections(self.pdf_data, self.sections('final'), diff=True)
+        self.assertEqual(self.stored(), [(order, f"{order}. final") for order in range(4)])
+
+    def test_diff_removes_extra_rows_for_an_order(self):
+        save_sections(self.pdf_data, self.sections('old'))
+        self.pdf_data.sections.create(title="0. duplicate", content="duplicate", order=0)
+
+        _, counts = save_sections(self.pdf_data, self.sections('old'), diff=True)
+
+        self.assertEqual(self.stored(), [(order, f"{order}. old") for order in range(4)])
+        self.assertEqual((counts['unchanged'], counts['deleted']), (4, 1))
+
+    def test_diff_keeps_unchanged_rows_and_rewrites_changed_ones(self):
+        save_sections(self.pdf_data, self.sections('old'))
+        ids = dict(self.pdf_data.sections.values_list('order', 'id'))
+        revised = self.sections('old', count=3)
+        revised[1] = {'title': "1. new", 'content': "new", 'order': 1}
+
+        _, counts = save_sections(self.pdf_data, revised, diff=True)
+
+        self.assertEqual(
+            (counts['created'], counts['updated'], counts['unchanged'], counts['deleted']), (0, 1, 2, 1)
+        )
+        self.assertEqual(self.stored(), [(0, "0. old"), (1, "1. new"), (2, "2. old")])
+        self.assertEqual(dict(self.pdf_data.sections.values_list('order', 'id')), {order: ids[order] for order in range(3)})
+
+    def test_catalog_version_is_bumped_once_per_save(self):
+        save_sections(self.pdf_data, self.sections('old', count=50))
+        with self.captureOnCommitCallbacks() as callbacks:
+            save_sections(self.pdf_data, self.sections('new', count=50), batch_size=10)
+        self.assertEqual(callbacks.count(bump_version), 1)
+
+
+class PdfIngestionTests(TemporaryFilesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.category = Category.objects.create(categoryName="Informatique", description="x")
+        self.professor = User.objects.create_user('prof', 'prof@example.com', 'pass', role='prof')
+
+    def make_course(self, data=None):
+        course = Course(title="Cours", description="x", file_type='pdf', professor=self.professor, category=self.category)
+        course.pdfs.save('cours.pdf', ContentFile(data or pdf_bytes()), save=False)
+        course.save()
+        return course
+
+    def replace_pdf(self, course, **pdf_options):
+        course.pdfs.save('cours.pdf', ContentFile(pdf_bytes(**pdf_options)), save=False)
+        course.save()
+
+    def test_one_job_per_course_runs_at_a_time(self):
+        course = self.make_course()
+        first = claim_next_job()
+        self.replace_pdf(course, label="Revised")
+
+        self.assertEqual(PdfIngestionJob.objects.get(pk=first.pk).status, PdfIngestionJob.STATUS_SUPERSEDED)
+        self.assertIsNone(claim_next_job())
+
+        run_job(first)
+        self.assertEqual(PdfIngestionJob.objects.get(pk=first.pk).status, PdfIngestionJob.STATUS_CANCELLED)
+        self.assertFalse(CoursePdfInternal.objects.filter(course=course, sections__isnull=False).exists())
+
+        second = claim_next_job()
+        run_job(second)
+        self.assertEqual(PdfIngestionJob.objects.get(pk=second.pk).status, PdfIngestionJob.STATUS_SUCCEEDED)
+        contents = list(CoursePdfInternal.objects.get(course=course).sections.values_list('content', flat=True))
+        self.assertEqual(len(contents), 6)
+        self.assertTrue(all(content.startswith("Revised") for content in contents))
+
+    def test_identical_pdfs_are_extracted_once(self):
+        data = pdf_bytes()
+        first = ingest_course_pdf(self.make_course(data))
+        second = ingest_course_pdf(self.make_course(data))
+
+        self.assertEqual(first.content_sha256, second.content_sha256)
+        stats = PdfExtractionStats.objects.get(pdf_data=second)
+        self.assertEqual((stats.from_cache, stats.pages, stats.sections), (True, 0, 6))
+        self.assertEqual(
+            list(second.sections.values_list('title', 'content')), list(first.sections.values_list('title', 'content'))
+        )
+
+    def test_extraction_stats_are_recorded(self):
+        pdf_data = ingest_course_pdf(self.make_course())
+
+        stats = PdfExtractionStats.objects.get(pdf_data=pdf_data)
+        self.assertEqual((stats.from_cache, stats.workers, stats.pages, stats.sections), (False, 1, 3, 6))
+        self.assertEqual(stats.pdf_name, pdf_data.name)
+        self.assertGreater(stats.blocks, 0)
+        self.assertGreaterEqual(stats.total_seconds, stats.persist_seconds)
+
+    def test_stale_jobs_are_retried_until_out_of_attempts(self):
+        job = self.make_course()._ingestion_job
+        long_ago = timezone.now() - timedelta(days=1)
+        PdfIngestionJob.objects.filter(pk=job.pk).update(status='running', attempts=1, started_at=long_ago)
+        self.assertEqual(requeue_stale_jobs(), 1)
+        self.assertEqual(PdfIngestionJob.objects.get(pk=job.pk).status, PdfIngestionJob.STATUS_PENDING)
+
+        PdfIngestionJob.objects.filter(pk=job.pk).update(status='running', attempts=3, started_at=long_ago)
+        requeue_stale_jobs()
+        self.assertEqual(PdfIngestionJob.objects.get(pk=job.pk).status, PdfIngestionJob.STATUS_FAILED)
+
+        PdfIngestionJob.objects.filter(pk=job.pk).update(status='pending')
+        self.assertIsNone(claim_next_job())
+
+    def test_jobs_are_visible_to_the_course_professor_only(self):
+        job = self.make_course()._ingestion_job
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('autre', 'autre@example.com', 'pass', role='prof'))
+        self.assertEqual(client.get(f'/courses/api/ingestion-jobs/{job.pk}/').status_code, 404)
+        client.force_authenticate(self.professor)
+        self.assertEqual(client.get(f'/courses/api/ingestion-jobs/{job.pk}/').json()['pdf_name'], job.pdf_name)
+        client.force_authenticate(User.objects.create_user('admin', 'admin@example.com', 'pass', is_staff=True))
+        self.assertEqual(client.get(f'/courses/api/ingestion-jobs/{job.pk}/').status_code, 200)
+
+
+class ExtractionTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'cours.pdf')
+        with open(self.path, 'wb') as f:
+            f.write(pdf_bytes(pages=12, sections_per_page=3))
+
+    @override_settings(PDF_EXTRACTION_PARALLEL_MIN_PAGES=1)
+    def test_parallel_extraction_matches_serial(self):
+        serial = extract_sections(self.path, workers=1)
+        stats = ExtractionStats()
+        parallel = extract_sections(self.path, workers=3, stats=stats)
+        self.assertGreater(stats.workers, 1)
+        self.assertEqual(parallel, serial)
+        self.assertEqual(len(serial[0]), 36)
+
+    def test_sections_are_streamed_as_pages_are_read(self):
+        stats = ExtractionStats()
+        sections = stream_sections(self.path, workers=1, stats=stats)
+        first = next(sections)
+        self.assertLess(stats.pages, 12)
+        self.assertEqual([first, *sections], extract_sections(self.path, workers=1)[0])
+
+
+class SectionReaderTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(categoryName="Informatique", description="x")
+        professor = User.objects.create_user('prof', 'prof@example.com', 'pass', role='prof')
+        self.course = Course.objects.create(
+            title="Cours", description="x", file_type='video', professor=professor, category=category,
+        )
+        pdf_data = CoursePdfInternal.objects.create(course=self.course, name='cours.pdf', content_sha256='a' * 64)
+        sections = [{'title': f"{order}. Titre", 'content': f"Texte {order}", 'order': order} for order in range(5)]
+        pdf_data.table_of_contents, _ = save_sections(pdf_data, sections)
+        pdf_data.save()
+        self.url = f'/courses/{self.course.pk}/sections/'
+
+    def test_returns_the_requested_range(self):
+        data = self.client.get(self.url, {'start': 1, 'end': 3, 'toc': 'false'}).json()
+        self.assertEqual((data['count'], data['start'], data['end']), (5, 1, 3))
+        self.assertEqual([section['order'] for section in data['sections']], [1, 2])
+        self.assertNotIn('table_of_contents', data)
+
+    def test_unchanged_ranges_answer_304(self):
+        response = self.client.get(self.url, {'start': 1, 'end': 3})
+        etag = response['ETag']
+        self.assertEqual(self.client.get(self.url, {'start': 1, 'end': 3}, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(self.url, {'start': 2, 'end': 3}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        CoursePdfInternal.objects.filter(course=self.course).update(content_sha256='b' * 64)
+        self.assertEqual(self.client.get(self.url, {'start': 1, 'end': 3}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_rejects_non_integer_bounds(self):
+        self.assertEqual(self.client.get(self.url, {'start': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'end': '2.5'}).status_code, 400)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(categoryName="Informatique", description="x")
+        professor = User.objects.create_user('prof', 'prof@example.com', 'pass', role='prof')
+        self.course = Course.objects.create(
+            title="Réseaux", description="x", file_type='video', professor=professor, category=category,
+        )
+        self.pdf_data = CoursePdfInternal.objects.create(course=self.course, name='cours.pdf')
+        save_sections(self.pdf_data, [
+            {'title': "1. Introduction", 'content': "Les routeurs relient les réseaux <b>locaux</b>.", 'order': 0},
+            {'title': "2. Routage dynamique", 'content': "Protocoles de routage.", 'order': 1},
+            {'title': "3. Conclusion", 'content': "Fin du cours.", 'order': 2},
+        ])
+
+    def search(self, query):
+        return self.client.get('/courses/search/', {'q': query}).json()['results']
+
+    def indexed_rows(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {FTS_TABLE}")
+            return cursor.fetchone()[0]
+
+    def test_finds_sections_and_escapes_snippets(self):
+        results = self.search("routage")
+        self.assertEqual([result['order'] for result in results], [1])
+        self.assertEqual(results[0]['course_id'], self.course.pk)
+
+        snippet = self.search("routeurs")[0]['snippet']
+        self.assertIn("<mark>routeurs</mark>", snippet)
+        self.assertIn("&lt;b&gt;locaux&lt;/b&gt;", snippet)
+
+    def test_prefix_of_the_last_term_matches(self):
+        self.assertEqual([result['order'] for result in self.search("conclu")], [2])
+
+    def test_deleting_the_pdf_data_removes_its_index_rows(self):
+        self.assertEqual(self.indexed_rows(), 3)
+        self.pdf_data.delete()
+        self.assertEqual(self.indexed_rows(), 0)
+        self.assertEqual(self.search("routage"), [])
+
+    def test_requires_a_query(self):
+        self.assertEqual(self.client.get('/courses/search/').status_code, 400)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class ResponseCacheTests(TransactionTestCase):
+    def setUp(self):
+        category = Category.objects.create(categoryName="Informatique", description="x")
+        professor = User.objects.create_user('prof', 'prof@example.com', 'pass', role='prof')
+        self.course = Course.objects.create(
+            title="Cours", description="x", file_type='video', professor=professor, category=category,
+        )
+        self.key = response_cache.cache_key(RequestFactory().get('/courses/'))
+
+    def tearDown(self):
+        response_cache.get_cache().clear()
+        response_cache.get_version_cache().clear()
+
+    def titles(self, response):
+        return [course['title'] for course in response.json()]
+
+    def test_stale_entries_are_served_while_refreshed_in_the_background(self):
+        self.assertEqual(self.client.get('/courses/')['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/courses/')['X-Cache'], 'HIT')
+
+        # Age the entry, and change the course without signals so the version stays.
+        data, stored_at = response_cache.get_cache().get(self.key)
+        response_cache.get_cache().set(self.key, (data, stored_at - response_cache.FRESH_SECONDS - 1))
+        Course.objects.filter(pk=self.course.pk).update(title="Cours renommé")
+
+        response = self.client.get('/courses/')
+        self.assertEqual((response['X-Cache'], self.titles(response)), ('STALE', ["Cours"]))
+
+        deadline = time.monotonic() + 5
+        while response_cache.get_cache().get(self.key)[0][0]['title'] != "Cours renommé":
+            self.assertLess(time.monotonic(), deadline, "The entry was not refreshed.")
+            time.sleep(0.05)
+        response = self.client.get('/courses/')
+        self.assertEqual((response['X-Cache'], self.titles(response)), ('HIT', ["Cours renommé"]))
+
+    def test_saves_orphan_cached_entries(self):
+        self.client.get('/courses/')
+        self.course.title = "Cours renommé"
+        self.course.save()
+        response = self.client.get('/courses/')
+        self.assertEqual((response['X-Cache'], self.titles(response)), ('MISS', ["Cours renommé"]))
+
+
+@mock.patch.object(previews, 'WORKERS', 0)
+class PreviewTests(TemporaryFilesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        category = Category.objects.create(categoryName="Informatique", description="x")
+        professor = User.objects.create_user('prof', 'prof@example.com', 'pass', role='prof')
+        course = Course(title="Cours", description="x", file_type='pdf', professor=professor, category=category)
+        course.pdfs.save('cours.pdf', ContentFile(pdf_bytes()), save=False)
+        course.save()
+        self.course = course
+
+    def preview(self, page, headers=None, **params):
+        return self.client.get(f'/courses/{self.course.pk}/pages/{page}/preview/', params, headers=headers)
+
+    def test_renderings_are_cached(self):
+        with mock.patch.object(previews, '_render_page', wraps=previews._render_page) as render:
+            first = self.preview(1, dpi=100)
+            second = self.preview(1, dpi=96)
+        self.assertEqual((first.status_code, first['Content-Type']), (200, 'image/png'))
+        self.assertEqual(b"".join(first.streaming_content), b"".join(second.streaming_content))
+        self.assertEqual(render.call_count, 1)  # 100 dpi is snapped to 96
+        self.assertEqual(self.preview(1, headers={'If-None-Match': first['ETag']}).status_code, 304)
+        self.assertEqual(self.preview(9).status_code, 404)
+
+    def test_least_recently_used_renderings_are_evicted(self):
+        digest = previews.pdf_digest(self.course.pdf_path)
+        paths = [previews.render_preview(self.course.pdf_path, digest, page, 48, 'png') for page in (1, 2, 3)]
+        for age, path in zip((30, 20, 10), paths):
+            os.utime(path, (time.time() - age, time.time() - age))
+        previews.render_preview(self.course.pdf_path, digest, 1, 48, 'png')  # A hit counts as an access
+
+        self.assertEqual(previews.evict(max_bytes=os.path.getsize(paths[0]) + os.path.getsize(paths[2])), 1)
+        self.assertEqual([os.path.exists(path) for path in paths], [True, False, True])
@@ -0,0 +1,265 @@
+"""
+Resumable chunked uploads of course files.
+
+Large videos sent through add_course are spooled whole by Django's upload
+handlers and a dropped connection starts over. Instead, clients can:
+
+1. POST courses/api/uploads/ with filename, size, kind ('pdfs' or 'videos')
+   and optionally sha256, which returns the upload id;
+2. PUT the raw bytes to courses/api/uploads/<id>/ in chunks, each with an
+   `Upload-Offset` header equal to the number of bytes already received.
+   After a failure, GET or HEAD the same URL to read the offset to resume
+   from;
+3. POST the course fields to courses/api/uploads/<id>/complete/ once all
+   bytes are in. The file is moved under the Course field's upload_to and
+   the Course is created, which queues PDF ingestion as usual.
+   With a sha256, hashing a multi-GB file would hold the request for
+   minutes, so the upload is answered with 202 and left 'verifying'; the
+   ingestion workers check the checksum and create the course (or mark the
+   upload 'failed' with an error). Poll the upload URL for the outcome.
+
+Chunk bodies are copied from the request stream straight into a temporary
+file in UPLOAD_TEMP_DIR, so nothing is buffered in memory. That directory is
+outside MEDIA_ROOT, so partial files are never served.
+"""
+import logging
+import os
+import re
+import shutil
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from .extraction_cache import file_sha256
+from .models import Category, ChunkedUpload, Course
+
+logger = logging.getLogger(__name__)
+
+CHUNK_MAX_BYTES = getattr(settings, 'UPLOAD_CHUNK_MAX_BYTES', 64 * 1024 * 1024)
+MAX_BYTES = getattr(settings, 'UPLOAD_MAX_BYTES', 10 * 1024 * 1024 * 1024)
+EXPIRY_HOURS = getattr(settings, 'UPLOAD_EXPIRY_HOURS', 24)
+READ_SIZE = 1024 * 1024
+SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+FILE_TYPES = {'pdfs': 'pdf', 'videos': 'video'}  # Upload kind -> Course.file_type
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset  # Current offset, so the client knows where to resume
+
+
+def _checksum(value):
+    value = (value or '').strip().lower()
+    if value and not SHA256_PATTERN.match(value):
+        raise UploadError("sha256 must be 64 hexadecimal characters.")
+    return value
+
+
+def start_upload(user, filename, size, kind, sha256=''):
+    if kind not in FILE_TYPES:
+        raise UploadError("kind must be 'pdfs' or 'videos'.")
+    filename = get_valid_filename(os.path.basename(filename or ''))
+    if not filename:
+        raise UploadError("filename is required.")
+    if kind == 'pdfs' and not filename.lower().endswith('.pdf'):
+        raise UploadError("PDF uploads must have a .pdf filename.")
+    if size <= 0 or size > MAX_BYTES:
+        raise UploadError(f"size must be between 1 and {MAX_BYTES} bytes.", status=413 if size > 0 else 400)
+
+    upload = ChunkedUpload.objects.create(
+        user=user, kind=kind, filename=filename, size=size, sha256=_checksum(sha256)
+    )
+    os.makedirs(os.path.dirname(upload.temp_path), exist_ok=True)
+    open(upload.temp_path, 'wb').close()
+    return upload
+
+
+def write_chunk(upload, offset, stream, length):
+    """
+    Appends `length` bytes read from stream at `offset`, which must be the
+    upload's current offset. Bytes that arrived before a dropped connection
+    are kept, so the client resumes from wherever the transfer stopped.
+    Returns the new offset.
+    """
+    if upload.status != ChunkedUpload.STATUS_UPLOADING:
+        raise UploadError("Upload already completed.", status=409)
+    if offset != upload.offset:
+        raise UploadError("Upload-Offset does not match the received bytes.", status=409, offset=upload.offset)
+    if length is None:
+        raise UploadError("Content-Length is required.", status=411)
+    if length > CHUNK_MAX_BYTES:
+        raise UploadError(f"Chunks are limited to {CHUNK_MAX_BYTES} bytes.", status=413)
+    if offset + length > upload.size:
+        raise UploadError("Chunk goes past the announced size.", offset=upload.offset)
+
+    written = 0
+    try:
+        with open(upload.temp_path, 'r+b') as f:
+            f.seek(offset)
+            while written < length:
+                chunk = stream.read(min(READ_SIZE, length - written)) if stream is not None else b''
+                if not chunk:
+                    break
+                f.write(chunk)
+                written += len(chunk)
+    finally:
+        if written:
+            # Conditional on the offset, so two requests racing on the same
+            # chunk can't both advance it.
+            advanced = ChunkedUpload.objects.filter(pk=upload.pk, offset=offset).update(
+                offset=offset + written, updated_at=timezone.now()
+            )
+            if advanced:
+                upload.offset = offset + written
+    if written < length:
+        raise UploadError("Chunk ended early; resume from the returned offset.", offset=upload.offset)
+    if upload.offset != offset + written:
+        upload.refresh_from_db(fields=['offset'])
+        raise UploadError("Concurrent write for this offset.", status=409, offset=upload.offset)
+    return upload.offset
+
+
+def complete_upload(upload, create_course, course_fields, sha256=''):
+    """
+    Finishes an upload whose bytes are all in. Without a checksum, moves the
+    file to its final storage name and returns create_course(name). With one,
+    queues the upload for verify_upload, which creates the course from
+    course_fields (Course.objects.create keyword arguments), and returns None.
+    """
+    if upload.status != ChunkedUpload.STATUS_UPLOADING:
+        raise UploadError("Upload already completed.", status=409)
+    if upload.offset != upload.size:
+        raise UploadError("Upload is incomplete.", status=409, offset=upload.offset)
+    expected = _checksum(sha256) or upload.sha256
+    if not expected:
+        return _finalize(upload, create_course, ChunkedUpload.STATUS_UPLOADING)
+
+    queued = ChunkedUpload.objects.filter(pk=upload.pk, status=ChunkedUpload.STATUS_UPLOADING).update(
+        status=ChunkedUpload.STATUS_VERIFYING, sha256=expected, course_fields=course_fields,
+        updated_at=timezone.now(),
+    )
+    if not queued:
+        raise UploadError("Upload already completed.", status=409)
+    upload.refresh_from_db()
+    return None
+
+
+def _finalize(upload, create_course, from_status):
+    """
+    Moves the file to its final storage name and calls create_course(name) in
+    a transaction. The file is moved back if the course can't be created.
+    """
+    field = Course._meta.get_field(upload.kind)
+    name = field.storage.get_available_name(field.generate_filename(None, upload.filename))
+    final_path = field.storage.path(name)
+
+    with transaction.atomic():
+        # Claims the upload, so a repeated complete request can't create a second course.
+        claimed = ChunkedUpload.objects.filter(pk=upload.pk, status=from_status).update(
+            status=ChunkedUpload.STATUS_COMPLETED, updated_at=timezone.now()
+        )
+        if not claimed:
+            raise UploadError("Upload already completed.", status=409)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        # UPLOAD_TEMP_DIR and MEDIA_ROOT may be on different filesystems.
+        shutil.move(upload.temp_path, final_path)
+        try:
+            course = create_course(name)
+        except Exception:
+            shutil.move(final_path, upload.temp_path)
+            raise
+        ChunkedUpload.objects.filter(pk=upload.pk).update(course=course)
+
+    upload.status = ChunkedUpload.STATUS_COMPLETED
+    upload.course = course
+    logger.info(f"Chunked upload {upload.pk} completed as {name} for course {course.pk}")
+    return course
+
+
+def claim_next_upload():
+    """
+    Moves the oldest upload waiting for verification to processing and
+    returns it, or None. Conditional like the ingestion job claims.
+    """
+    candidates = list(
+        ChunkedUpload.objects.filter(status=ChunkedUpload.STATUS_VERIFYING)
+        .order_by('updated_at', 'id')
+        .values_list('id', flat=True)[:10]
+    )
+    for upload_id in candidates:
+        claimed = ChunkedUpload.objects.filter(id=upload_id, status=ChunkedUpload.STATUS_VERIFYING).update(
+            status=ChunkedUpload.STATUS_PROCESSING, updated_at=timezone.now()
+        )
+        if claimed:
+            return ChunkedUpload.objects.get(id=upload_id)
+    return None
+
+
+def verify_upload(upload):
+    """
+    Checks a claimed upload's checksum and creates its course. On a mismatch
+    the partial file is deleted and the upload marked failed, with the error
+    the client reads when polling. Other errors (database, filesystem) only
+    record the error: the upload stays claimed and requeue_stale_jobs hands
+    it to a worker again after PDF_INGESTION_JOB_TIMEOUT.
+    """
+    try:
+        try:
+            digest = file_sha256(upload.temp_path)
+        except FileNotFoundError:
+            return _fail_upload(upload, "Upload data is missing.")
+        if digest != upload.sha256:
+            try:
+                os.remove(upload.temp_path)
+            except FileNotFoundError:
+                pass
+            return _fail_upload(upload, f"Checksum mismatch: received data hashes to {digest}.")
+        if not Category.objects.filter(pk=upload.course_fields.get('category_id')).exists():
+            return _fail_upload(upload, "Category no longer exists.")
+
+        def create_course(name):
+            return Course.objects.create(
+                professor_id=upload.user_id, file_type=FILE_TYPES[upload.kind],
+                **upload.course_fields, **{upload.kind: name},
+            )
+
+        return _finalize(upload, create_course, ChunkedUpload.STATUS_PROCESSING)
+    except Exception as e:
+        logger.error(f"Chunked upload {upload.pk} verification will be retried: {e}", exc_info=True)
+        ChunkedUpload.objects.filter(pk=upload.pk, status=ChunkedUpload.STATUS_PROCESSING).update(error=str(e))
+        return None
+
+
+def _fail_upload(upload, error):
+    logger.warning(f"Chunked upload {upload.pk} failed verification: {error}")
+    ChunkedUpload.objects.filter(pk=upload.pk, status=ChunkedUpload.STATUS_PROCESSING).update(
+        status=ChunkedUpload.STATUS_FAILED, error=error, updated_at=timezone.now()
+    )
+    return None
+
+
+def discard_upload(upload):
+    try:
+        os.remove(upload.temp_path)
+    except FileNotFoundError:
+        pass
+    upload.delete()
+
+
+def purge_stale_uploads():
+    """Deletes unfinished or failed uploads untouched for UPLOAD_EXPIRY_HOURS. Returns the count."""
+    cutoff = timezone.now() - timedelta(hours=EXPIRY_HOURS)
+    stale = ChunkedUpload.objects.filter(
+        status__in=(ChunkedUpload.STATUS_UPLOADING, ChunkedUpload.STATUS_FAILED), updated_at__lt=cutoff
+    )
+    count = 0
+    for upload in stale.iterator():
+        discard_upload(upload)
+        count += 1
+    return count
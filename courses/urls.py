@@ -1,17 +1,38 @@
 from django.urls import path
-from .views import courses, categories, course, quizzes, submit_quiz, add_course, EnrollCourseView, CreateReviewView, CourseReviewsView, MyEnrolledCoursesView
+from . import async_views
+from .views import courses, categories, course, course_sections, course_preview, course_page_preview, search_sections, quizzes, submit_quiz, submit_quiz_bulk, quiz_cache_stats, add_course, EnrollCourseView, CreateReviewView, CourseReviewsView, MyEnrolledCoursesView, PdfIngestionJobView, CourseListView, course_rating_summary, student_dashboard, bulk_enroll, start_chunked_upload, chunked_upload, complete_chunked_upload
 
 
 
 urlpatterns = [
     path('', courses),
     path('categories/', categories),
+    path('api/catalog/', CourseListView.as_view(), name='course-catalog'),
+    path('search/', search_sections, name='course-search'),
     path('api/enroll/', EnrollCourseView.as_view(), name='enroll-course'),
+    path('api/enroll/bulk/', bulk_enroll, name='bulk-enroll'),
     path('<str:pk>/', course, name='course-detail'),
-    path('<str:pk>/quizzes/', quizzes, name='quizzes'),
+    path('<str:course_id>/quizzes/', quizzes, name='quizzes'),
+    path('<str:pk>/sections/', course_sections, name='course-sections'),
+    path('<str:pk>/preview/', course_preview, name='course-preview'),
+    path('<str:pk>/pages/<int:page>/preview/', course_page_preview, name='course-page-preview'),
     path('api/submit-quiz/', submit_quiz),
+    path('api/submit-quiz/bulk/', submit_quiz_bulk, name='submit-quiz-bulk'),
+    path('api/quiz-cache/stats/', quiz_cache_stats, name='quiz-cache-stats'),
     path('api/add-course/', add_course),
+    path('api/uploads/', start_chunked_upload, name='upload-start'),
+    path('api/uploads/<uuid:upload_id>/', chunked_upload, name='upload-chunk'),
+    path('api/uploads/<uuid:upload_id>/complete/', complete_chunked_upload, name='upload-complete'),
     path('api/enroll/my-courses/', MyEnrolledCoursesView.as_view(), name='my-courses'),
+    path('api/dashboard/', student_dashboard, name='student-dashboard'),
     path('api/reviews/add/', CreateReviewView.as_view(), name='add-review'),
     path('api/reviews/<int:cours_id>/', CourseReviewsView.as_view(), name='course-reviews'),
+    path('api/reviews/<int:cours_id>/summary/', course_rating_summary, name='course-rating-summary'),
+    path('api/ingestion-jobs/<int:pk>/', PdfIngestionJobView.as_view(), name='ingestion-job'),
+    # Async (ASGI) versions of the read-heavy endpoints
+    path('api/async/courses/', async_views.courses, name='async-courses'),
+    path('api/async/courses/<str:pk>/', async_views.course, name='async-course-detail'),
+    path('api/async/categories/', async_views.categories, name='async-categories'),
+    path('api/async/reviews/<int:cours_id>/', async_views.course_reviews, name='async-course-reviews'),
+    path('api/async/my-courses/', async_views.my_courses, name='async-my-courses'),
 ]
\ No newline at end of file
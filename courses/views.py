@@ -1,11 +1,32 @@
 from rest_framework.decorators import api_view, permission_classes, parser_classes
 from rest_framework.response import Response
 from rest_framework import status, generics, permissions
-from .models import Course, Category, Quiz, Question, Choice, QuizResult, EnrolledCourse, Review
+from .models import Course, Category, Quiz, QuizResult, EnrolledCourse, Review, PdfIngestionJob, CoursePdfInternal, ChunkedUpload
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.filters import OrderingFilter
 from django.shortcuts import get_object_or_404
-from .serializers import CourseSerializer, CategorySerializer, EnrolledCourseSerializer, ReviewSerializer
+from django.http import FileResponse
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from .serializers import CourseSerializer, CourseSummarySerializer, CourseSectionSerializer, CategorySerializer, EnrolledCourseSerializer, ReviewSerializer, PdfIngestionJobSerializer, ChunkedUploadSerializer
+from .pagination import CourseCursorPagination, ReviewCursorPagination
+from .query_planning import OptimizedQuerysetMixin, optimize_queryset
+from .search import get_search_backend
+from .grading import answer_errors, grade, score_answers
+from .quiz_cache import get_answer_key, get_answer_keys, get_quiz_payloads, quiz_cache
+from .permissions import IsProfessorOrAdmin
+from .ratings import rating_histogram
+from .response_cache import cached_response
+from .uploads import CHUNK_MAX_BYTES, FILE_TYPES, UploadError, complete_upload, discard_upload, start_upload, write_chunk
+from .previews import CONTENT_TYPES, pdf_digest, render_preview, snap_dpi
+from django.utils.decorators import method_decorator
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -13,24 +34,237 @@ from .serializers import CourseSerializer, CategorySerializer, EnrolledCourseSer
 def add_course(request):
     serializer = CourseSerializer(data=request.data)
     if serializer.is_valid():
-        serializer.save(professor=request.user)
-        return Response(serializer.data, status=201)
+        course = serializer.save(professor=request.user)
+        data = dict(serializer.data)
+        # PDF extraction runs in the background; clients poll the job for progress.
+        job = getattr(course, '_ingestion_job', None)
+        data['ingestion_job'] = job.pk if job else None
+        return Response(data, status=201)
     return Response(serializer.errors, status=400)
 
 
 @api_view(['GET'])
+@cached_response
 def courses(request):
-    courses = Course.objects.all()
+    courses = optimize_queryset(Course.objects.all(), CourseSerializer)
     data = CourseSerializer(courses, many=True, context={'request': request}).data
     return Response(data)
 
+class CourseListView(OptimizedQuerysetMixin, generics.ListAPIView):
+    """
+    Paginated catalog listing. Uses the summary serializer (no PDF sections)
+    and supports `?fields=` to trim the payload further.
+    """
+    queryset = Course.objects.all()
+    serializer_class = CourseSummarySerializer
+    pagination_class = CourseCursorPagination
+    permission_classes = [permissions.AllowAny]
+    # ?ordering=-rating etc.; the cursor follows the chosen ordering
+    filter_backends = [OrderingFilter]
+    ordering_fields = ['created_at', 'rating', 'review_count']
+
+    @method_decorator(cached_response)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
 @api_view(['GET'])
+@cached_response
 def course(request, pk):
-    course = Course.objects.get(id = pk)
+    course = optimize_queryset(Course.objects.all(), CourseSerializer).get(id = pk)
     data = CourseSerializer(course , many=False, context={'request': request}).data
     return Response(data)
 
 @api_view(['GET'])
+def course_sections(request, pk):
+    """
+    Section reader. Returns the table of contents plus the section bodies in
+    the order range [start, end) (default: the first section only), so
+    readers get something on screen fast and fetch the rest on demand.
+    Pass `toc=false` to skip the table of contents on follow-up pages.
+    Responses carry an ETag derived from the PDF content hash.
+    """
+    pdf_data = get_object_or_404(
+        CoursePdfInternal.objects.only('id', 'name', 'content_sha256', 'table_of_contents'), course_id=pk
+    )
+    try:
+        start = max(0, int(request.query_params.get('start', 0)))
+        end = int(request.query_params.get('end', start + 1))
+    except ValueError:
+        return Response({"error": "start and end must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+    end = max(start, min(end, start + settings.COURSE_SECTIONS_MAX_RANGE))
+    include_toc = request.query_params.get('toc', 'true').lower() != 'false'
+
+    etag = quote_etag(f"{pdf_data.pk}-{pdf_data.content_sha256 or pdf_data.name}-{start}-{end}-{int(include_toc)}")
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+
+    sections = pdf_data.sections.filter(order__gte=start, order__lt=end).only('id', 'title', 'content', 'order')
+    data = {
+        'count': len(pdf_data.table_of_contents),
+        'start': start,
+        'end': end,
+        'sections': CourseSectionSerializer(sections, many=True).data,
+    }
+    if include_toc:
+        data['table_of_contents'] = pdf_data.table_of_contents
+
+    response = Response(data)
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+def _upload_error(error):
+    data = {"error": str(error)}
+    response = Response(data, status=error.status)
+    if error.offset is not None:
+        data['offset'] = error.offset
+        response['Upload-Offset'] = str(error.offset)
+    return response
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def start_chunked_upload(request):
+    """Starts a resumable course file upload (protocol in courses/uploads.py)."""
+    try:
+        size = int(request.data.get('size', ''))
+    except (TypeError, ValueError):
+        return Response({"error": "size must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        upload = start_upload(
+            request.user, request.data.get('filename', ''), size,
+            request.data.get('kind', ''), request.data.get('sha256', ''),
+        )
+    except UploadError as e:
+        return _upload_error(e)
+    data = dict(ChunkedUploadSerializer(upload).data)
+    data['chunk_size'] = CHUNK_MAX_BYTES
+    return Response(data, status=status.HTTP_201_CREATED)
+
+@api_view(['GET', 'HEAD', 'PUT', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def chunked_upload(request, upload_id):
+    """
+    GET/HEAD: upload state, with the resume offset in `Upload-Offset`.
+    PUT: raw chunk bytes as the body, written at the `Upload-Offset` header.
+    DELETE: abandons the upload.
+    """
+    upload = get_object_or_404(ChunkedUpload, pk=upload_id, user=request.user)
+    if request.method == 'DELETE':
+        discard_upload(upload)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    if request.method == 'PUT':
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+            length = int(request.headers['Content-Length']) if request.headers.get('Content-Length') else None
+        except ValueError:
+            return Response({"error": "Upload-Offset and Content-Length must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            # Read the body directly rather than through DRF's parsers.
+            write_chunk(upload, offset, request.stream, length)
+        except UploadError as e:
+            return _upload_error(e)
+    response = Response(ChunkedUploadSerializer(upload).data)
+    response['Upload-Offset'] = str(upload.offset)
+    return response
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def complete_chunked_upload(request, upload_id):
+    """
+    Finishes an upload: takes the add_course fields (plus `category` id and
+    optional `sha256`) and creates the course. With a checksum, answers 202
+    and the course is created once a worker has verified the file.
+    """
+    upload = get_object_or_404(ChunkedUpload, pk=upload_id, user=request.user)
+    category = Category.objects.filter(pk=request.data.get('category') or None).first()
+    if category is None:
+        return Response({"category": ["Catégorie introuvable."]}, status=status.HTTP_400_BAD_REQUEST)
+    serializer = CourseSerializer(data=request.data, context={'request': request})
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    def create_course(name):
+        return serializer.save(
+            professor=request.user, category=category, file_type=FILE_TYPES[upload.kind], **{upload.kind: name}
+        )
+
+    course_fields = {
+        field: value for field, value in serializer.validated_data.items()
+        if field in ('title', 'description', 'duration')
+    }
+    course_fields['category_id'] = category.pk
+    try:
+        course = complete_upload(upload, create_course, course_fields, sha256=request.data.get('sha256', ''))
+    except UploadError as e:
+        return _upload_error(e)
+    if course is None:
+        return Response(ChunkedUploadSerializer(upload).data, status=status.HTTP_202_ACCEPTED)
+    data = dict(serializer.data)
+    job = getattr(course, '_ingestion_job', None)
+    data['ingestion_job'] = job.pk if job else None
+    return Response(data, status=status.HTTP_201_CREATED)
+
+@api_view(['GET'])
+def course_preview(request, pk):
+    """Cover thumbnail: the first page of the course PDF. `?dpi=48&type=webp|png`."""
+    return _pdf_page_preview(request, pk, 1, settings.PDF_PREVIEW_THUMBNAIL_DPI, 'webp')
+
+@api_view(['GET'])
+def course_page_preview(request, pk, page):
+    """One page (1-based) of the course PDF as an image. `?dpi=96&type=png|webp`."""
+    return _pdf_page_preview(request, pk, page, settings.PDF_PREVIEW_DPI, 'png')
+
+def _pdf_page_preview(request, pk, page, default_dpi, default_type):
+    # `type` rather than `format`: DRF reserves ?format= for renderer selection.
+    image_type = request.query_params.get('type', default_type).lower()
+    if image_type not in CONTENT_TYPES:
+        return Response({"error": "type must be png or webp."}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        dpi = snap_dpi(request.query_params.get('dpi', default_dpi))
+    except ValueError:
+        return Response({"error": "dpi must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+    course = get_object_or_404(Course.objects.only('id', 'pdfs', 'file_type'), pk=pk)
+    if course.file_type != 'pdf' or not course.pdfs:
+        return Response({"error": "Ce cours n'a pas de PDF."}, status=status.HTTP_404_NOT_FOUND)
+
+    # Reuse the hash stored at ingestion when it describes the current file.
+    pdf_data = CoursePdfInternal.objects.filter(course_id=course.pk).values_list('name', 'content_sha256').first()
+    if pdf_data and pdf_data[0] == course.pdfs.name and pdf_data[1]:
+        digest = pdf_data[1]
+    else:
+        digest = pdf_digest(course.pdf_path)
+
+    etag = quote_etag(f"{digest}-{page}-{dpi}-{image_type}")
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+
+    path = render_preview(course.pdf_path, digest, page, dpi, image_type)
+    if path is None:
+        return Response({"error": "Page introuvable."}, status=status.HTTP_404_NOT_FOUND)
+
+    response = FileResponse(open(path, 'rb'), content_type=CONTENT_TYPES[image_type])
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, max_age=settings.PDF_PREVIEW_MAX_AGE)
+    return response
+
+@api_view(['GET'])
+def search_sections(request):
+    """Ranked full-text search over course sections: `?q=...&limit=20`."""
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({"error": "q is required."}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = min(max(1, int(request.query_params.get('limit', 20))), settings.COURSE_SEARCH_MAX_RESULTS)
+    except ValueError:
+        return Response({"error": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+    results = get_search_backend().search(query, limit=limit)
+    return Response({'query': query, 'results': results})
+
+@api_view(['GET'])
+@cached_response
 def categories(request):
     categories = Category.objects.all()
     data = CategorySerializer(categories, many=True, context={'request': request}).data
@@ -38,9 +272,8 @@ def categories(request):
     
 @api_view(['GET'])
 def quizzes(request, course_id):
-    quizzes = Quiz.objects.filter(course_id=course_id)
-    data = QuizSerializer(quizzes, many=True).data
-    return Response(data)
+    quiz_ids = list(Quiz.objects.filter(course_id=course_id).order_by('id').values_list('id', flat=True))
+    return Response(get_quiz_payloads(quiz_ids))
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -50,16 +283,7 @@ def submit_quiz(request):
     answers = request.data.get('answers')
 
     quiz = get_object_or_404(Quiz, id=quiz_id)
-    total_questions = quiz.questions.count()
-    correct_answers = 0
-
-    for answer in answers:
-        question = get_object_or_404(Question, id=answer['question_id'], quiz=quiz)
-        selected_choice = get_object_or_404(Choice, id=answer['selected_choice_id'], question=question)
-        if selected_choice.is_correct:
-            correct_answers += 1
-
-    score = (correct_answers / total_questions) * 100
+    score = grade(get_answer_key(quiz.id), answers)
 
     # Save the result
     QuizResult.objects.create(
@@ -73,6 +297,72 @@ def submit_quiz(request):
         'score': score
     })
 
+@api_view(['POST'])
+@permission_classes([IsProfessorOrAdmin])
+def submit_quiz_bulk(request):
+    """
+    Grades many students' submissions at once, e.g. a paper exam typed in
+    by the professor. Body: {"submissions": [{"student_id", "quiz_id", "answers"}, ...]}.
+    All submissions are validated first; nothing is saved if any is invalid.
+    Professors may only grade quizzes of their own courses.
+    """
+    submissions = request.data.get('submissions')
+    if not isinstance(submissions, list) or not submissions:
+        return Response({"error": "submissions must be a non-empty list."}, status=status.HTTP_400_BAD_REQUEST)
+
+    errors = []
+    parsed = []
+    for index, submission in enumerate(submissions):
+        try:
+            parsed.append((int(submission['student_id']), int(submission['quiz_id']), submission.get('answers')))
+        except (KeyError, TypeError, ValueError, AttributeError):
+            errors.append({'index': index, 'error': "student_id and quiz_id must be integers."})
+    if errors:
+        return Response({'submissions': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    quiz_owners = dict(
+        Quiz.objects.filter(id__in={quiz_id for _, quiz_id, _ in parsed}).values_list('id', 'course__professor_id')
+    )
+    user = request.user
+    if not (user.is_staff or user.role == 'admin'):
+        foreign = sorted(quiz_id for quiz_id, professor_id in quiz_owners.items() if professor_id != user.id)
+        if foreign:
+            return Response(
+                {"error": "You can only grade quizzes of your own courses.", "quiz_ids": foreign},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+    quiz_ids = set(quiz_owners)
+    student_ids = set(User.objects.filter(id__in={student_id for student_id, _, _ in parsed}).values_list('id', flat=True))
+    answer_keys = get_answer_keys(quiz_ids)
+
+    results = []
+    for index, (student_id, quiz_id, answers) in enumerate(parsed):
+        if quiz_id not in quiz_ids:
+            errors.append({'index': index, 'error': f"Quiz {quiz_id} does not exist."})
+        elif student_id not in student_ids:
+            errors.append({'index': index, 'error': f"Student {student_id} does not exist."})
+        else:
+            problems = answer_errors(answer_keys[quiz_id], answers)
+            if problems:
+                errors.append({'index': index, 'answers': problems})
+            else:
+                score = score_answers(answer_keys[quiz_id], answers)
+                results.append(QuizResult(student_id=student_id, quiz_id=quiz_id, score=score))
+    if errors:
+        return Response({'submissions': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    QuizResult.objects.bulk_create(results, batch_size=500)
+    return Response({
+        'message': f"{len(results)} submissions graded.",
+        'results': [{'student_id': r.student_id, 'quiz_id': r.quiz_id, 'score': r.score} for r in results],
+    }, status=status.HTTP_201_CREATED)
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def quiz_cache_stats(request):
+    """Hit/miss counters of the in-process quiz cache, for monitoring."""
+    return Response(quiz_cache.stats())
+
 class EnrollCourseView(generics.CreateAPIView):
     serializer_class = EnrolledCourseSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -83,16 +373,74 @@ class EnrollCourseView(generics.CreateAPIView):
         if not cours_id:
             return Response({"error": "cours ID is required."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Vérifie s'il est déjà inscrit
-        if EnrolledCourse.objects.filter(cours_id=cours_id, etudiant=request.user).exists():
-            return Response({"message": "Déjà inscrit à ce cours."}, status=status.HTTP_200_OK)
+        # Crée l'inscription; the unique constraint on (cours, etudiant)
+        # rejects duplicates, including concurrent clicks, in the same statement.
+        try:
+            with transaction.atomic():
+                inscription = EnrolledCourse.objects.create(cours_id=cours_id, etudiant=request.user)
+        except IntegrityError:
+            if EnrolledCourse.objects.filter(cours_id=cours_id, etudiant=request.user).exists():
+                return Response({"message": "Déjà inscrit à ce cours."}, status=status.HTTP_200_OK)
+            return Response({"error": "Cours introuvable."}, status=status.HTTP_404_NOT_FOUND)
+        except (TypeError, ValueError):
+            return Response({"error": "cours ID must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Crée l'inscription
-        inscription = EnrolledCourse.objects.create(cours_id=cours_id, etudiant=request.user)
         serializer = self.get_serializer(inscription)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-class MyEnrolledCoursesView(generics.ListAPIView):
+
+@api_view(['POST'])
+@permission_classes([IsProfessorOrAdmin])
+def bulk_enroll(request):
+    """
+    Enrolls a whole cohort into a course: {"cours": id, "etudiants": [ids]}.
+    Rows are inserted in batches with ON CONFLICT DO NOTHING, so repeating
+    the call or overlapping cohorts is harmless. Professors may only enroll
+    students into their own courses.
+    """
+    try:
+        course_id = int(request.data.get('cours'))
+    except (TypeError, ValueError):
+        return Response({"error": "cours must be a course ID."}, status=status.HTTP_400_BAD_REQUEST)
+    course = get_object_or_404(Course.objects.only('id', 'professor_id'), id=course_id)
+    user = request.user
+    if not (user.is_staff or user.role == 'admin' or course.professor_id == user.id):
+        return Response({"error": "You can only enroll students into your own courses."}, status=status.HTTP_403_FORBIDDEN)
+
+    etudiants = request.data.get('etudiants')
+    if not isinstance(etudiants, list) or not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in etudiants):
+        return Response({"error": "etudiants must be a list of user IDs."}, status=status.HTTP_400_BAD_REQUEST)
+    student_ids = sorted(set(etudiants))
+
+    batch_size = settings.ENROLLMENT_BATCH_SIZE
+    unknown = []
+    already_enrolled = 0
+    enrolled = 0
+    for start in range(0, len(student_ids), batch_size):
+        batch = student_ids[start:start + batch_size]
+        existing = set(User.objects.filter(id__in=batch).values_list('id', flat=True))
+        unknown.extend(pk for pk in batch if pk not in existing)
+        present = set(
+            EnrolledCourse.objects.filter(cours=course, etudiant_id__in=existing).values_list('etudiant_id', flat=True)
+        )
+        new_ids = existing - present
+        # Rows inserted concurrently since the lookup are skipped by the conflict clause.
+        EnrolledCourse.objects.bulk_create(
+            [EnrolledCourse(cours=course, etudiant_id=pk) for pk in sorted(new_ids)],
+            ignore_conflicts=True,
+        )
+        already_enrolled += len(present)
+        enrolled += len(new_ids)
+
+    return Response({
+        'cours': course.id,
+        'requested': len(student_ids),
+        'enrolled': enrolled,
+        'already_enrolled': already_enrolled,
+        'unknown_students': unknown,
+    }, status=status.HTTP_200_OK)
+
+class MyEnrolledCoursesView(OptimizedQuerysetMixin, generics.ListAPIView):
     serializer_class = EnrolledCourseSerializer
     permission_classes = [IsAuthenticated]
 
@@ -100,6 +448,54 @@ class MyEnrolledCoursesView(generics.ListAPIView):
         return EnrolledCourse.objects.filter(etudiant=self.request.user)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def student_dashboard(request):
+    """
+    Everything the student dashboard shows in one response: enrolled courses
+    (summary fields), latest score per quiz and quiz progress per course.
+    Always two queries, however many courses the student is enrolled in.
+    """
+    enrollments = list(
+        EnrolledCourse.objects.filter(etudiant=request.user)
+        .select_related('cours__professor', 'cours__category')
+        .annotate(quiz_count=Count('cours__quizzes'))
+        .order_by('-date_inscription')
+    )
+    course_ids = [enrollment.cours_id for enrollment in enrollments]
+
+    # Newest attempt first, so the first result seen per quiz is the latest one.
+    latest_scores = {}
+    results = (
+        QuizResult.objects.filter(student=request.user, quiz__course_id__in=course_ids)
+        .select_related('quiz')
+        .order_by('quiz_id', '-completed_at', '-id')
+    )
+    for result in results:
+        scores = latest_scores.setdefault(result.quiz.course_id, {})
+        if result.quiz_id not in scores:
+            scores[result.quiz_id] = {
+                'quiz_id': result.quiz_id,
+                'quiz_title': result.quiz.title,
+                'score': result.score,
+                'completed_at': result.completed_at,
+            }
+
+    data = []
+    for enrollment in enrollments:
+        scores = list(latest_scores.get(enrollment.cours_id, {}).values())
+        data.append({
+            'enrollment_id': enrollment.id,
+            'date_inscription': enrollment.date_inscription,
+            'course': CourseSummarySerializer(enrollment.cours, context={'request': request}).data,
+            'quiz_count': enrollment.quiz_count,
+            'quizzes_completed': len(scores),
+            'progress': round(100.0 * len(scores) / enrollment.quiz_count, 1) if enrollment.quiz_count else 0.0,
+            'latest_scores': scores,
+        })
+    return Response(data)
+
+
 class CreateReviewView(generics.CreateAPIView):
     serializer_class = ReviewSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -107,10 +503,38 @@ class CreateReviewView(generics.CreateAPIView):
     def perform_create(self, serializer):
         serializer.save(etudiant=self.request.user)
 
-class CourseReviewsView(generics.ListAPIView):
+class CourseReviewsView(OptimizedQuerysetMixin, generics.ListAPIView):
+    """
+    Reviews of a course, newest first, cursor-paginated so every page is an
+    index range scan on (cours, date_creation, id) whatever its depth.
+    The student is joined in the same query.
+    """
     serializer_class = ReviewSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = ReviewCursorPagination
 
     def get_queryset(self):
         cours_id = self.kwargs['cours_id']
-        return Review.objects.filter(cours_id=cours_id).order_by('-date_creation')
\ No newline at end of file
+        return Review.objects.filter(cours_id=cours_id).order_by('-date_creation', '-id')
+
+class PdfIngestionJobView(generics.RetrieveAPIView):
+    serializer_class = PdfIngestionJobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        # Jobs of other professors' courses answer 404, like missing ones.
+        user = self.request.user
+        if user.is_staff or user.role == 'admin':
+            return PdfIngestionJob.objects.all()
+        return PdfIngestionJob.objects.filter(course__professor=user)
+
+@api_view(['GET'])
+def course_rating_summary(request, cours_id):
+    """Header of the reviews page, read from the maintained aggregates."""
+    course = get_object_or_404(Course.objects.only('id', 'rating', 'review_count'), id=cours_id)
+    return Response({
+        'cours': course.id,
+        'review_count': course.review_count,
+        'rating': course.rating,
+        'histogram': rating_histogram(course.id),
+    })
@@ -0,0 +1,124 @@
+"""
+Resized image derivatives.
+
+Uploaded course images, category images and avatars are often full-size
+photos. When one is saved, an ImageDerivativeJob is queued (see
+courses/ingestion.py) and a background worker runs `write_derivatives`,
+which writes recompressed copies at each IMAGE_DERIVATIVE_WIDTHS width and
+IMAGE_DERIVATIVE_FORMATS format under MEDIA_ROOT/<IMAGE_DERIVATIVE_DIR>/,
+next to the original's path. The variants of a replaced image are deleted.
+Names are derived from the original's name, so serializers can build the
+srcset map (`SrcsetField`) without touching the database; they only check
+that the derivatives were written and otherwise return None, leaving
+clients on the original URL.
+"""
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+from rest_framework import serializers
+
+WIDTHS = tuple(getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', (160, 320, 640, 1280)))
+FORMATS = tuple(getattr(settings, 'IMAGE_DERIVATIVE_FORMATS', ('webp', 'jpeg')))
+QUALITY = getattr(settings, 'IMAGE_DERIVATIVE_QUALITY', 80)
+DERIVATIVE_DIR = getattr(settings, 'IMAGE_DERIVATIVE_DIR', 'derivatives')
+
+PIL_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+
+
+def derivative_name(name, width, fmt):
+    # The original extension is kept so photo.png and photo.jpg don't collide.
+    return f"{DERIVATIVE_DIR}/{name}.{width}w.{EXTENSIONS[fmt]}"
+
+
+def derivative_names(name):
+    return [(width, fmt, derivative_name(name, width, fmt)) for fmt in FORMATS for width in WIDTHS]
+
+
+def has_derivatives(field_file):
+    # The largest variant of the last format is written last.
+    return field_file.storage.exists(derivative_name(field_file.name, WIDTHS[-1], FORMATS[-1]))
+
+
+def delete_derivatives(storage, name):
+    """Removes every variant of the image stored as `name`, e.g. after it was replaced."""
+    for _, _, derivative in derivative_names(name):
+        if storage.exists(derivative):
+            storage.delete(derivative)
+
+
+def _encode(image, fmt):
+    if fmt == 'jpeg' and image.mode != 'RGB':
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        else:
+            image = image.convert('RGB')
+    elif fmt == 'webp' and image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() or image.mode == 'P' else 'RGB')
+    buffer = BytesIO()
+    image.save(buffer, PIL_FORMATS[fmt], quality=QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def write_derivatives(storage, name, force=False):
+    """
+    Writes every derivative of the image stored as `name`. Images narrower
+    than a target width are re-encoded at their own size rather than
+    upscaled. Returns the number of files written.
+    """
+    if not force and storage.exists(derivative_name(name, WIDTHS[-1], FORMATS[-1])):
+        return 0
+    with storage.open(name, 'rb') as f:
+        original = Image.open(f)
+        original = ImageOps.exif_transpose(original)  # Phone photos rely on the EXIF orientation
+        original.load()
+
+    written = 0
+    for width in WIDTHS:
+        resized = original
+        if original.width > width:
+            height = max(1, round(original.height * width / original.width))
+            resized = original.resize((width, height), Image.Resampling.LANCZOS)
+        for fmt in FORMATS:
+            derivative = derivative_name(name, width, fmt)
+            if storage.exists(derivative):
+                storage.delete(derivative)
+            storage.save(derivative, ContentFile(_encode(resized, fmt)))
+            written += 1
+    return written
+
+
+def generate_derivatives(field_file, force=False):
+    """write_derivatives for a FieldFile; returns 0 for an empty field."""
+    if not field_file:
+        return 0
+    return write_derivatives(field_file.storage, field_file.name, force=force)
+
+
+def srcset_map(field_file, request=None):
+    """
+    Returns {format: {width: url}} for field_file, or None when it has no
+    derivatives (yet).
+    """
+    if not field_file or not has_derivatives(field_file):
+        return None
+    storage = field_file.storage
+    variants = {}
+    for width, fmt, name in derivative_names(field_file.name):
+        url = storage.url(name)
+        if request is not None:
+            url = request.build_absolute_uri(url)
+        variants.setdefault(fmt, {})[str(width)] = url
+    return variants
+
+
+class SrcsetField(serializers.ReadOnlyField):
+    """Read-only map of resized variants for an image field, e.g. `SrcsetField(source='image')`."""
+
+    def to_representation(self, value):
+        return srcset_map(value, self.context.get('request', None))
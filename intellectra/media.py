@@ -0,0 +1,133 @@
+"""
+Media file delivery.
+
+Replaces django.conf.urls.static for MEDIA_URL: files are streamed in
+chunks, single byte ranges are honoured (206 Partial Content) so video
+players can seek, and ETag/Last-Modified enable conditional GETs. When
+MEDIA_ACCEL_REDIRECT_PREFIX (nginx) or MEDIA_USE_X_SENDFILE (Apache,
+lighttpd) is set, Django only answers the headers and the front proxy sends
+the bytes, so large downloads don't hold a worker.
+"""
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _file_range(path, start, length, chunk_size):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _parse_range(header, size):
+    """
+    Returns (start, end) inclusive for a single-range header, None when the
+    header should be ignored (multiple ranges, bad syntax), or 'invalid' when
+    it is unsatisfiable.
+    """
+    match = RANGE_PATTERN.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:  # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:  # Nothing to return, not even from an empty file
+            return 'invalid'
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        return 'invalid'
+    return start, min(end, size - 1)
+
+
+def _if_range_matches(request, etag, mtime):
+    # A Range request is only honoured if the client's copy is still current.
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    date = parse_http_date_safe(if_range)
+    return date is not None and int(mtime) <= date
+
+
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("File not found.")
+    try:
+        file_stat = os.stat(full_path)
+    except OSError:
+        raise Http404("File not found.")
+    if not stat.S_ISREG(file_stat.st_mode):
+        raise Http404("File not found.")
+
+    size = file_stat.st_size
+    mtime = file_stat.st_mtime
+    etag = f'"{file_stat.st_mtime_ns:x}-{size:x}"'
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(mtime))
+    if not_modified is not None:
+        return not_modified
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+
+    accel_prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', None)
+    if accel_prefix or getattr(settings, 'MEDIA_USE_X_SENDFILE', False):
+        # The proxy serves the body and handles Range itself.
+        response = HttpResponse(content_type=content_type)
+        if accel_prefix:
+            response['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + quote(path)
+        else:
+            response['X-Sendfile'] = full_path
+    else:
+        chunk_size = getattr(settings, 'MEDIA_STREAM_CHUNK_SIZE', 64 * 1024)
+        byte_range = None
+        range_header = request.META.get('HTTP_RANGE')
+        if range_header and _if_range_matches(request, etag, mtime):
+            byte_range = _parse_range(range_header, size)
+
+        if byte_range == 'invalid':
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f"bytes */{size}"
+            return response
+        if byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(
+                _file_range(full_path, start, length, chunk_size), status=206, content_type=content_type
+            )
+            response['Content-Range'] = f"bytes {start}-{end}/{size}"
+            response['Content-Length'] = str(length)
+        else:
+            response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+            response.block_size = chunk_size
+
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(mtime)
+    return response
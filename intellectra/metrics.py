@@ -0,0 +1,330 @@
+"""
+Request metrics.
+
+`MetricsMiddleware` records, per URL route: request latency, the number and
+total time of database queries, time spent in serializers (classes using
+`TimedSerializerMixin`) and the response size. `metrics_view` exposes them
+in the Prometheus text format at /metrics, to staff and to scrapers holding
+METRICS_TOKEN, and requests slower than
+METRICS_SLOW_REQUEST_MS are logged as one JSON object on the
+'intellectra.metrics' logger.
+
+The registry lives in process memory: with several server workers each one
+reports its own numbers, so scrape them individually or aggregate.
+"""
+import hmac
+import json
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for labelvalues, value in sorted(values.items()):
+            yield self.name, dict(zip(self.labelnames, labelvalues)), value
+
+
+class Histogram:
+    type = 'histogram'
+
+    def __init__(self, name, documentation, buckets, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = tuple(labelnames)
+        self._values = {}  # labelvalues -> [per-bucket counts..., overflow, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        with self._lock:
+            state = self._values.get(labelvalues)
+            if state is None:
+                state = self._values[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[index] += 1
+                    break
+            else:
+                state[len(self.buckets)] += 1
+            state[-1] += value
+
+    def samples(self):
+        with self._lock:
+            values = {labelvalues: list(state) for labelvalues, state in self._values.items()}
+        for labelvalues, state in sorted(values.items()):
+            labels = dict(zip(self.labelnames, labelvalues))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), state[:-1]):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, 'le': _format_value(float(bound))}, cumulative
+            yield f"{self.name}_sum", labels, state[-1]
+            yield f"{self.name}_count", labels, cumulative
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, buckets, labelnames=()):
+        return self.register(Histogram(name, documentation, buckets, labelnames))
+
+    def register_collector(self, collector):
+        """
+        collector() is called on every scrape and returns an iterable of
+        (name, type, documentation, value) for values owned elsewhere, such
+        as cache statistics.
+        """
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        for collector in collectors:
+            try:
+                collected = list(collector())
+            except Exception as e:
+                logger.warning(f"Metrics collector {collector!r} failed: {e}")
+                continue
+            for name, metric_type, documentation, value in collected:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                lines.append(f"{name} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.histogram(
+    'http_request_duration_seconds', "Time spent handling a request.", LATENCY_BUCKETS, ('view', 'method'),
+)
+REQUESTS = registry.counter(
+    'http_requests_total', "Requests handled, by response status.", ('view', 'method', 'status'),
+)
+DB_QUERIES = registry.histogram(
+    'db_queries_per_request', "Database queries executed per request.", QUERY_COUNT_BUCKETS, ('view',),
+)
+DB_TIME = registry.histogram(
+    'db_query_duration_seconds', "Total database query time per request.", LATENCY_BUCKETS, ('view',),
+)
+SERIALIZER_TIME = registry.histogram(
+    'serializer_duration_seconds', "Time spent serializing per request.", LATENCY_BUCKETS, ('view',),
+)
+RESPONSE_SIZE = registry.histogram(
+    'http_response_size_bytes', "Response body size (non-streaming responses).", SIZE_BUCKETS, ('view',),
+)
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_seconds', 'serializer_seconds', 'serializer_depth')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.serializer_depth = 0
+
+
+_current_stats = ContextVar('request_stats', default=None)
+
+
+def _record_query(execute, sql, params, many, context):
+    """
+    Execute wrapper installed on every connection. The stats travel in a
+    context variable, which sync_to_async copies into its worker thread, so
+    queries issued by async views are counted too.
+    """
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - start
+
+
+def _install_query_recorder(connection):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    _install_query_recorder(connection)
+
+
+class TimedSerializerMixin:
+    """
+    Adds the serializer's to_representation time to the current request's
+    stats. Nested serializers using the mixin are not counted twice.
+    """
+
+    def to_representation(self, instance):
+        stats = _current_stats.get()
+        if stats is None or stats.serializer_depth:
+            return super().to_representation(instance)
+        stats.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            stats.serializer_seconds += time.perf_counter() - start
+            stats.serializer_depth -= 1
+
+
+def _view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unresolved>'
+    return match.route or match.view_name or '<unknown>'
+
+
+class MetricsMiddleware:
+    """
+    Records per-route request metrics; keep it first in MIDDLEWARE so it
+    sees the whole request. Supports both WSGI and ASGI, so async views
+    don't get pushed onto a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        slow_ms = getattr(settings, 'METRICS_SLOW_REQUEST_MS', None)
+        self.slow_seconds = slow_ms / 1000 if slow_ms is not None else None
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        # Connections opened before this module was loaded missed the signal.
+        for connection in connections.all(initialized_only=True):
+            _install_query_recorder(connection)
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        self._record(request, response, stats, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        self._record(request, response, stats, time.perf_counter() - start)
+        return response
+
+    def _record(self, request, response, stats, duration):
+        view = _view_label(request)
+        size = None if response.streaming else len(response.content)
+        REQUEST_LATENCY.observe(duration, view, request.method)
+        REQUESTS.inc(view, request.method, str(response.status_code))
+        DB_QUERIES.observe(stats.queries, view)
+        DB_TIME.observe(stats.db_seconds, view)
+        SERIALIZER_TIME.observe(stats.serializer_seconds, view)
+        if size is not None:
+            RESPONSE_SIZE.observe(size, view)
+
+        if self.slow_seconds is not None and duration >= self.slow_seconds:
+            logger.warning(json.dumps({
+                'event': 'slow_request',
+                'method': request.method,
+                'path': request.path,
+                'view': view,
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 1),
+                'db_queries': stats.queries,
+                'db_ms': round(stats.db_seconds * 1000, 1),
+                'serializer_ms': round(stats.serializer_seconds * 1000, 1),
+                'response_bytes': size,
+            }))
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. The metrics list every route with its query
+    counts and latencies, so only scrapers sending `Authorization: Bearer
+    <METRICS_TOKEN>` and logged-in staff may read them; without a token
+    configured, that leaves staff only.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    authorized = bool(token) and hmac.compare_digest(
+        request.headers.get('Authorization', '').encode(), f"Bearer {token}".encode()
+    )
+    if not authorized and not getattr(request.user, 'is_staff', False):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
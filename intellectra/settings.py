@@ -55,6 +55,7 @@ REST_FRAMEWORK = {
 }
 
 MIDDLEWARE = [
+    'intellectra.metrics.MetricsMiddleware',  # First, so it times the whole request
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -143,4 +144,114 @@ CORS_ALLOW_ALL_ORIGINS = True
 import os
 
 MEDIA_URL = '/media/'  
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
\ No newline at end of file
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Background PDF ingestion (courses/ingestion.py, `manage.py run_ingestion_workers`)
+PDF_INGESTION_WORKERS = 2
+PDF_INGESTION_MAX_ATTEMPTS = 3
+PDF_INGESTION_RETRY_DELAY = 30  # seconds, doubled on each retry
+PDF_INGESTION_POLL_INTERVAL = 2  # seconds
+PDF_INGESTION_JOB_TIMEOUT = 3600  # seconds before a running job is requeued
+
+# Page-level PDF extraction (courses/extraction.py)
+PDF_EXTRACTION_WORKERS = 4  # 1 forces the serial path
+PDF_EXTRACTION_PARALLEL_MIN_PAGES = 32  # Smaller documents are read serially
+COURSE_SECTION_BATCH_SIZE = 500  # Rows per bulk INSERT/UPDATE when saving sections
+PDF_INGESTION_DIFF_SECTIONS = True  # On re-upload, only write sections whose content changed
+
+# Extraction results cache, keyed by PDF content hash (courses/extraction_cache.py)
+PDF_EXTRACTION_CACHE_DIR = os.path.join(BASE_DIR, 'cache', 'extraction')
+PDF_EXTRACTION_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Section reader (courses/<pk>/sections/)
+COURSE_SECTIONS_MAX_RANGE = 50  # Max sections returned per request
+
+# Section search (courses/search.py). Leave the backend unset to use FTS5 on
+# SQLite and the ORM fallback elsewhere.
+COURSE_SEARCH_BACKEND = None
+COURSE_SEARCH_MAX_RESULTS = 50
+
+# In-process quiz answer key / payload cache (courses/quiz_cache.py)
+QUIZ_CACHE_MAX_ENTRIES = 1024
+QUIZ_CACHE_TTL = 300  # seconds; upper bound on staleness if QUIZ_CACHE_ALIAS is not shared
+QUIZ_CACHE_ALIAS = 'shared'  # Holds the version counters; must be shared by all workers (see CACHES)
+
+# Bulk enrollment (courses/api/enroll/bulk/)
+ENROLLMENT_BATCH_SIZE = 1000  # Students per INSERT ... ON CONFLICT DO NOTHING
+
+# Caches. The catalog alias holds serialized responses of the catalog
+# endpoints (courses/response_cache.py); local memory is per process, which
+# is fine for entries. The shared alias holds small counters every process
+# (web workers and ingestion workers) must agree on, such as the catalog
+# version. The file-based default is shared by processes on one host; use
+# Redis or Memcached when running on several hosts.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'catalog': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'catalog',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'shared'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+CATALOG_CACHE_VERSION_ALIAS = 'shared'  # Where the catalog version lives; must be shared by all processes
+CATALOG_CACHE_TTL = 60  # seconds an entry is served as fresh
+CATALOG_CACHE_STALE_TTL = 600  # further seconds it is served stale while refreshing
+
+# Media delivery (intellectra/media.py). Set one of the offload options to
+# let the front proxy send file bodies instead of a Django worker.
+MEDIA_ACCEL_REDIRECT_PREFIX = None  # nginx internal location aliased to MEDIA_ROOT, e.g. '/protected-media/'
+MEDIA_USE_X_SENDFILE = False  # Apache mod_xsendfile / lighttpd
+MEDIA_STREAM_CHUNK_SIZE = 64 * 1024
+
+# Resized variants of uploaded images (intellectra/imaging.py), written to
+# MEDIA_ROOT/<IMAGE_DERIVATIVE_DIR>/ by the ingestion workers after upload. Run
+# `manage.py generate_image_derivatives --force` after changing these.
+IMAGE_DERIVATIVE_WIDTHS = (160, 320, 640, 1280)
+IMAGE_DERIVATIVE_FORMATS = ('webp', 'jpeg')
+IMAGE_DERIVATIVE_QUALITY = 80
+IMAGE_DERIVATIVE_DIR = 'derivatives'
+
+# Rendered PDF page previews (courses/previews.py), cached on disk by content hash
+PDF_PREVIEW_CACHE_DIR = os.path.join(BASE_DIR, 'cache', 'previews')
+PDF_PREVIEW_WORKERS = 2  # Rendering processes; 0 renders in the request process
+PDF_PREVIEW_DPI = 96  # Default for courses/<pk>/pages/<page>/preview/
+PDF_PREVIEW_THUMBNAIL_DPI = 48  # Default for the cover thumbnail, courses/<pk>/preview/
+PDF_PREVIEW_DPIS = (48, 96, 150)  # Requested DPIs are snapped to these, bounding renderings per page
+PDF_PREVIEW_CACHE_MAX_BYTES = 256 * 1024 * 1024  # Least recently used renderings are evicted beyond this
+PDF_PREVIEW_WEBP_QUALITY = 80
+PDF_PREVIEW_MAX_AGE = 3600  # Browser cache lifetime (seconds) of a rendered page
+
+# Resumable chunked uploads (courses/uploads.py)
+UPLOAD_CHUNK_MAX_BYTES = 64 * 1024 * 1024  # Largest accepted PUT body
+UPLOAD_MAX_BYTES = 10 * 1024 * 1024 * 1024  # Largest accepted file
+UPLOAD_EXPIRY_HOURS = 24  # Unfinished or failed uploads older than this are removed by purge_stale_uploads
+UPLOAD_TEMP_DIR = os.path.join(BASE_DIR, 'cache', 'uploads')  # Partial files; must be outside MEDIA_ROOT so they are never served
+
+# Request metrics (intellectra/metrics.py), scraped from /metrics
+METRICS_SLOW_REQUEST_MS = 500  # Requests slower than this are logged as JSON; None disables
+METRICS_TOKEN = None  # Scrapers send "Authorization: Bearer <token>"; without one, /metrics is staff only
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {'format': '{asctime} {levelname} {name}: {message}', 'style': '{'},
+        'message': {'format': '{message}', 'style': '{'},  # Slow-request records are already JSON
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'simple'},
+        'json_console': {'class': 'logging.StreamHandler', 'formatter': 'message'},
+    },
+    'loggers': {
+        'courses': {'handlers': ['console'], 'level': 'INFO'},  # Includes courses.extraction
+        'intellectra': {'handlers': ['console'], 'level': 'INFO'},
+        'intellectra.metrics': {'handlers': ['json_console'], 'level': 'WARNING', 'propagate': False},
+    },
+}
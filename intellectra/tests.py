@@ -0,0 +1,81 @@
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+
+User = get_user_model()
+
+
+class MetricsAccessTests(TestCase):
+    def test_anonymous_requests_are_denied_without_a_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_scrapers_need_the_token(self):
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'http_request', response.content)
+
+    def test_staff_can_read_the_metrics(self):
+        self.client.force_login(User.objects.create_user('etudiant', 'etudiant@example.com', 'pass'))
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.client.force_login(User.objects.create_user('admin', 'admin@example.com', 'pass', is_staff=True))
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+
+class MediaTests(SimpleTestCase):
+    data = b"0123456789"
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        with open(os.path.join(directory.name, 'video.mp4'), 'wb') as f:
+            f.write(self.data)
+        open(os.path.join(directory.name, 'empty.mp4'), 'wb').close()
+        overrides = override_settings(MEDIA_ROOT=directory.name)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def get(self, name='video.mp4', **headers):
+        return self.client.get(f'/media/{name}', **headers)
+
+    def test_full_download(self):
+        response = self.get()
+        self.assertEqual((response.status_code, response['Accept-Ranges']), (200, 'bytes'))
+        self.assertEqual(b"".join(response.streaming_content), self.data)
+
+    def test_byte_ranges(self):
+        response = self.get(HTTP_RANGE='bytes=2-5')
+        self.assertEqual((response.status_code, response['Content-Range']), (206, 'bytes 2-5/10'))
+        self.assertEqual(b"".join(response.streaming_content), b"2345")
+
+        response = self.get(HTTP_RANGE='bytes=-3')
+        self.assertEqual(b"".join(response.streaming_content), b"789")
+        response = self.get(HTTP_RANGE='bytes=7-')
+        self.assertEqual(response['Content-Range'], 'bytes 7-9/10')
+
+    def test_unsatisfiable_ranges_answer_416(self):
+        response = self.get(HTTP_RANGE='bytes=10-12')
+        self.assertEqual((response.status_code, response['Content-Range']), (416, 'bytes */10'))
+        self.assertEqual(self.get('empty.mp4', HTTP_RANGE='bytes=-5').status_code, 416)
+
+    def test_if_range_falls_back_to_the_full_file_when_changed(self):
+        etag = self.get()['ETag']
+        self.assertEqual(self.get(HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE=etag).status_code, 206)
+        self.assertEqual(self.get(HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE='"outdated"').status_code, 200)
+
+    def test_conditional_get(self):
+        etag = self.get()['ETag']
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_missing_and_outside_files_answer_404(self):
+        self.assertEqual(self.get('missing.mp4').status_code, 404)
+        self.assertEqual(self.get('../settings.py').status_code, 404)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT_PREFIX='/protected-media/')
+    def test_proxy_offload_sends_headers_only(self):
+        response = self.get(HTTP_RANGE='bytes=2-5')
+        self.assertEqual((response.status_code, response['X-Accel-Redirect']), (200, '/protected-media/video.mp4'))
+        self.assertEqual(response.content, b"")
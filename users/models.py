@@ -1,5 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.signals import pre_save, post_save
+from django.dispatch import receiver
 
 class Utilisateur(AbstractUser):
     ROLES = [
@@ -11,4 +13,22 @@ class Utilisateur(AbstractUser):
     avatar = models.ImageField(upload_to='avatars/', null=True, blank=True)
     
     def __str__(self):
-        return f"{self.email} ({self.role})" 
\ No newline at end of file
+        return f"{self.email} ({self.role})"
+
+
+@receiver(pre_save, sender=Utilisateur)
+def remember_previous_avatar(sender, instance, **kwargs):
+    """Keeps the stored avatar name of an edited user, to retire its variants."""
+    instance._previous_avatar_name = None
+    update_fields = kwargs.get('update_fields')
+    if instance.pk and (update_fields is None or 'avatar' in update_fields):  # Skips e.g. last_login updates
+        instance._previous_avatar_name = sender.objects.filter(pk=instance.pk).values_list('avatar', flat=True).first()
+
+
+@receiver(post_save, sender=Utilisateur)
+def queue_avatar_derivatives(sender, instance, **kwargs):
+    """Queues resized variants of a newly uploaded avatar (see intellectra/imaging.py)."""
+    from courses.ingestion import image_changed
+    update_fields = kwargs.get('update_fields')
+    if update_fields is None or 'avatar' in update_fields:
+        image_changed(instance.avatar, getattr(instance, '_previous_avatar_name', None))
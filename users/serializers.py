@@ -1,11 +1,14 @@
 from rest_framework import serializers
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from intellectra.imaging import SrcsetField
+from intellectra.metrics import TimedSerializerMixin
 
 User = get_user_model()
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     avatar = serializers.SerializerMethodField()
+    avatar_srcset = SrcsetField(source='avatar')
 
     def get_avatar(self, obj):
         if obj.avatar:  
@@ -17,4 +20,4 @@ class UserSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = User
-        fields = ['id', 'username', 'email', 'role', 'avatar']
+        fields = ['id', 'username', 'email', 'role', 'avatar', 'avatar_srcset']
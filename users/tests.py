@@ -1,3 +1,16 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from courses.testing import QueryScalingMixin
+
+User = get_user_model()
+
+
+class UserQueryCountTests(QueryScalingMixin, TestCase):
+    def test_user_list(self):
+        def make_users(size):
+            for index in range(User.objects.count(), size):
+                User.objects.create_user(f'user{index}', f'user{index}@example.com', 'pass')
+
+        self.assertQueriesConstant(make_users, lambda: APIClient().get('/users/'))